@@ -0,0 +1,51 @@
+"""Сравнение ImageUtils.compare_images и compare_images_fast на кадрах 1080x2400.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_compare_images
+"""
+import timeit
+
+from benchmarks.frames import make_feed_frame
+from src.utils.image_utils import ImageUtils
+from src.core.parser_config import ParserConfig
+
+
+CONTENT_REGION = (0, 820, 1080, 2400)
+
+
+def main(number: int = 10) -> None:
+    base = make_feed_frame()
+    cases = {
+        "без скролла": make_feed_frame(),
+        "скролл 20px": make_feed_frame(offset=20),
+        "скролл 120px": make_feed_frame(offset=120),
+        "скролл 900px": make_feed_frame(offset=900),
+    }
+    threshold = ParserConfig.screenshot_similarity_threshold
+
+    print("Процент схожести: весь кадр точным и быстрым методом, затем быстрый по области ленты")
+    print("Время: точный метод по всему кадру и быстрый по области ленты с порогом")
+    print(
+        f"{'случай':<14} {'точно, %':>9} {'быстро, %':>10} {'область, %':>11} "
+        f"{'точно, мс':>10} {'быстро, мс':>11} {'ускорение':>10}"
+    )
+    for name, other in cases.items():
+        exact = ImageUtils.compare_images(base, other)
+        fast = ImageUtils.compare_images_fast(base, other)
+        region = ImageUtils.compare_images_fast(base, other, region=CONTENT_REGION)
+        bounded = ImageUtils.compare_images_fast(base, other, region=CONTENT_REGION, threshold=threshold)
+        assert (region >= threshold) == (bounded >= threshold), name
+
+        exact_time = timeit.timeit(lambda: ImageUtils.compare_images(base, other), number=number) / number * 1e3
+        fast_time = timeit.timeit(
+            lambda: ImageUtils.compare_images_fast(base, other, region=CONTENT_REGION, threshold=threshold),
+            number=number
+        ) / number * 1e3
+        print(
+            f"{name:<14} {exact:>9.2f} {fast:>10.2f} {region:>11.2f} "
+            f"{exact_time:>10.1f} {fast_time:>11.2f} {exact_time / fast_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Сравнение скомпилированных XPath с перебором словарей селекторов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_selectors [dump.xml ...]
+"""
+import sys
+import timeit
+
+from lxml import etree
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.core.nodes import SnapshotNodes
+from src.core.selector_compiler import compile_chain
+from src.core.hierarchy import HierarchySnapshot, Selector, SnapshotNode
+
+
+FIXTURES_PATH = Path(__file__).resolve().parent.parent / "fixtures" / "hierarchy"
+
+# Прежний способ поиска по снимку, оставлен как эталон для сверки и замера XPath
+_MATCHERS: Dict[str, Callable[[etree._Element, Any], bool]] = {
+    "text": lambda element, value: element.get("text", "") == value,
+    "textContains": lambda element, value: value in element.get("text", ""),
+    "textStartsWith": lambda element, value: element.get("text", "").startswith(value),
+    "className": lambda element, value: element.get("class", "") == value,
+    "description": lambda element, value: element.get("content-desc", "") == value,
+    "descriptionContains": lambda element, value: value in element.get("content-desc", ""),
+    "descriptionStartsWith": lambda element, value: element.get("content-desc", "").startswith(value),
+    "resourceId": lambda element, value: element.get("resource-id", "") == value,
+    "packageName": lambda element, value: element.get("package", "") == value,
+    "index": lambda element, value: element.get("index") == str(value),
+}
+
+
+def match_selector(element: etree._Element, selector: Selector) -> bool:
+    for key, value in selector.items():
+        matcher = _MATCHERS.get(key)
+        if matcher is None:
+            raise ValueError(f"Селектор '{key}' не поддерживается снимком иерархии")
+        if not matcher(element, value):
+            return False
+    return True
+
+
+def find_matching(start: etree._Element, selectors: Tuple[Selector, ...]) -> List[etree._Element]:
+    """Поиск перебором узлов со сверкой словарей селекторов при каждом вызове."""
+    elements = [start]
+
+    # Как и в uiautomator, child() ищет среди всех потомков, а не только прямых детей
+    for selector in selectors:
+        seen = set()
+        found = []
+        for element in elements:
+            for descendant in element.iterdescendants("node"):
+                if descendant not in seen and match_selector(descendant, selector):
+                    seen.add(descendant)
+                    found.append(descendant)
+        elements = found
+
+    return elements
+
+
+def collect_chains() -> Dict[str, Tuple[dict, ...]]:
+    snapshot_nodes = SnapshotNodes(HierarchySnapshot(device=None))
+    chains = {}
+    for group_name, group in vars(snapshot_nodes).items():
+        for node_name, node in vars(group).items():
+            if isinstance(node, SnapshotNode):
+                chains[f"{group_name}.{node_name}"] = node.selectors
+    return chains
+
+
+def bench_dump(path: Path, chains: Dict[str, Tuple[dict, ...]], number: int) -> None:
+    root = etree.fromstring(path.read_bytes())
+    print(f"\n{path.name}: {sum(1 for _ in root.iter('node'))} узлов")
+    print(f"{'цепочка':<45} {'словари, мкс':>14} {'XPath, мкс':>12} {'ускорение':>10}")
+
+    for name, selectors in chains.items():
+        xpath = compile_chain(selectors)
+        assert find_matching(root, selectors) == xpath(root), name
+
+        dict_time = timeit.timeit(lambda: find_matching(root, selectors), number=number) / number * 1e6
+        xpath_time = timeit.timeit(lambda: xpath(root), number=number) / number * 1e6
+        print(f"{name:<45} {dict_time:>14.1f} {xpath_time:>12.1f} {dict_time / xpath_time:>9.1f}x")
+
+
+def main(paths: List[str]) -> None:
+    dumps = [Path(p) for p in paths] or sorted(FIXTURES_PATH.glob("*.xml"))
+    chains = collect_chains()
+    for path in dumps:
+        bench_dump(path, chains, number=2000)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
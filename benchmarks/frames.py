@@ -0,0 +1,55 @@
+import numpy as np
+
+from PIL import Image, ImageDraw, ImageFont
+from PIL.Image import Image as PILImage
+
+
+def make_feed_frame(width: int = 1080, height: int = 2400, offset: int = 0, seed: int = 0) -> PILImage:
+    """Синтетический кадр ленты: превью, аватары и строки "текста" на белом фоне.
+
+    `offset` сдвигает ленту вверх, имитируя скролл на заданное число пикселей.
+    """
+    rng = np.random.default_rng(seed)
+    feed_height = height * 3
+    feed = np.full((feed_height, width, 3), 255, dtype=np.uint8)
+
+    top = 0
+    while top < feed_height:
+        thumb_height = width * 9 // 16
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        color = rng.integers(0, 255, size=3, dtype=np.uint8)
+        block = np.empty((thumb_height, width, 3), dtype=np.uint8)
+        block[...] = color
+        block[..., 0] = gradient
+        block = block + rng.integers(0, 20, size=block.shape, dtype=np.uint8)
+        feed[top:top + min(thumb_height, feed_height - top)] = block[:feed_height - top]
+
+        meta_top = top + thumb_height + 30
+        for line in range(3):
+            line_top = meta_top + line * 45
+            line_width = int(rng.integers(300, 900))
+            if line_top + 25 < feed_height:
+                feed[line_top:line_top + 25, 160:160 + line_width] = 40
+        if meta_top + 100 < feed_height:
+            feed[meta_top:meta_top + 100, 30:130] = rng.integers(0, 255, size=3, dtype=np.uint8)
+
+        top += thumb_height + 250
+
+    frame = np.full((height, width, 3), 255, dtype=np.uint8)
+    header = height // 3
+    frame[:header] = 20
+    frame[header:] = feed[offset:offset + height - header]
+    return Image.fromarray(frame)
+
+
+def make_ad_crop(
+    width: int = 1080,
+    lines: tuple = ("Example Store - Get the app today", "Sponsored · Install now", "4.6 ★ Free"),
+) -> PILImage:
+    """Синтетический текстовый блок объявления, как его вырезает AdParser."""
+    font = ImageFont.load_default(size=34)
+    image = Image.new("RGB", (width, 60 + 50 * len(lines)), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(lines):
+        draw.text((160, 30 + index * 50), line, fill=(15, 15, 15), font=font)
+    return image
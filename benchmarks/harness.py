@@ -0,0 +1,155 @@
+import gc
+import json
+import time
+import platform
+import tracemalloc
+
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_kib: float
+    samples: int
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(
+    name: str,
+    func: Callable[[], object],
+    number: int = 50,
+    warmup: int = 3,
+    setup: Optional[Callable[[], object]] = None,
+    min_time: float = 0.5,
+) -> BenchResult:
+    """Замер одного сценария: задержки по каждому вызову и пиковая память отдельным прогоном.
+
+    Память считается через tracemalloc, то есть видны аллокации Python и
+    numpy, а внутренние буферы PIL и lxml не учитываются.
+
+    `setup` вызывается перед каждым вызовом вне замера, например чтобы
+    сбросить кэш. Быстрые сценарии повторяются, пока суммарное время
+    не достигнет `min_time`, иначе p50 слишком зависит от шума.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        total = 0.0
+        while len(samples) < number or total < min_time:
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+            total += samples[-1]
+    finally:
+        gc.enable()
+
+    # tracemalloc замедляет выполнение, поэтому память меряется отдельным вызовом
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        ops_per_sec=len(samples) / sum(samples),
+        p50_ms=_percentile(samples, 50) * 1e3,
+        p99_ms=_percentile(samples, 99) * 1e3,
+        peak_kib=peak / 1024,
+        samples=len(samples),
+    )
+
+
+def print_results(results: List[BenchResult]) -> None:
+    print(f"{'сценарий':<48} {'оп/с':>10} {'p50, мс':>10} {'p99, мс':>10} {'пик, КиБ':>10}")
+    for result in results:
+        print(
+            f"{result.name:<48} {result.ops_per_sec:>10.1f} {result.p50_ms:>10.3f} "
+            f"{result.p99_ms:>10.3f} {result.peak_kib:>10.0f}"
+        )
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, dict]:
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def save_baseline(results: List[BenchResult], path: Path = BASELINE_PATH) -> None:
+    """Записывает результаты в базовую линию.
+
+    Сценарии, не замеренные в этом запуске (фильтр `-k` или нет tesseract),
+    остаются из прежней базовой линии, если она снята на этой же машине.
+    """
+    machine = f"{platform.node()} {platform.machine()} {platform.python_version()}"
+    saved: Dict[str, dict] = {}
+    if path.is_file():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("machine") == machine:
+            saved = data["results"]
+
+    saved.update({result.name: asdict(result) for result in results})
+    data = {"machine": machine, "results": saved}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+
+
+def compare_baseline(results: List[BenchResult], tolerance: float, path: Path = BASELINE_PATH) -> List[str]:
+    """Возвращает список регрессий относительно сохраненной базовой линии.
+
+    Регрессией считается рост p50 или пиковой памяти больше чем на
+    `tolerance` (доля). Сценарии без базовой линии сюда не попадают,
+    их возвращает `missing_baseline`.
+    """
+    if not path.is_file():
+        return [f"базовая линия {path} не найдена, сохраните ее через --save"]
+
+    baseline = load_baseline(path)
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        for field in ("p50_ms", "peak_kib"):
+            limit = base[field] * (1 + tolerance)
+            value = getattr(result, field)
+            if value > limit and value - base[field] > _noise_floor(field):
+                regressions.append(
+                    f"{result.name}: {field} {value:.3f} > {base[field]:.3f} (+{(value / base[field] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def missing_baseline(results: List[BenchResult], path: Path = BASELINE_PATH) -> List[str]:
+    """Сценарии, для которых в базовой линии нет записи."""
+    baseline = load_baseline(path)
+    return [result.name for result in results if result.name not in baseline]
+
+
+def _noise_floor(field: str) -> float:
+    # Для микросекундных сценариев и мелких аллокаций относительный порог слишком шумный
+    return 0.05 if field == "p50_ms" else 64
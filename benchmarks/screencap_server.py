@@ -0,0 +1,77 @@
+import io
+import base64
+import socket
+import struct
+import threading
+import numpy as np
+
+from PIL import Image
+from typing import Tuple
+from types import SimpleNamespace
+
+from src.core.screencap import RawScreencap
+
+
+class FrameServer:
+    """Локальная замена устройства, отдающая кадр по TCP на каждое соединение.
+
+    `raw` - ответ `exec:screencap`: заголовок Android 9+ и пиксели RGBA.
+    `jpeg` - как `takeScreenshot` uiautomator2: JPEG качества 80 в base64.
+    """
+
+    def __init__(self, frame: Image.Image, mode: str = "raw") -> None:
+        self.mode = mode
+        self.payload = self._raw(frame) if mode == "raw" else self._jpeg(frame)
+        self._socket = socket.create_server(("127.0.0.1", 0))
+        self.address: Tuple[str, int] = self._socket.getsockname()
+        self._thread = threading.Thread(target=self._serve, name=f"FrameServer-{mode}", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _raw(frame: Image.Image) -> bytes:
+        rgba = frame.convert("RGBA")
+        return struct.pack("<IIII", rgba.width, rgba.height, 1, 0) + rgba.tobytes()
+
+    @staticmethod
+    def _jpeg(frame: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        frame.convert("RGB").save(buffer, format="JPEG", quality=80)
+        return base64.b64encode(buffer.getvalue())
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            with connection:
+                connection.sendall(self.payload)
+
+    def connect(self) -> socket.socket:
+        return socket.create_connection(self.address)
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+def read_all(sock: socket.socket) -> bytes:
+    chunks = []
+    with sock:
+        while chunk := sock.recv(1 << 20):
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class JpegClient:
+    """Путь uiautomator2: base64, декодирование JPEG и перевод в RGB массив."""
+
+    def __init__(self, server: FrameServer) -> None:
+        self.server = server
+
+    def capture(self) -> np.ndarray:
+        image = Image.open(io.BytesIO(base64.b64decode(read_all(self.server.connect()))))
+        return np.asarray(image if image.mode == "RGB" else image.convert("RGB"))
+
+
+def raw_client(server: FrameServer) -> RawScreencap:
+    return RawScreencap(device=SimpleNamespace(serial="bench"), connect=server.connect)
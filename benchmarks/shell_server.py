@@ -0,0 +1,66 @@
+import socket
+import threading
+import subprocess
+
+from typing import Tuple
+from types import SimpleNamespace
+
+from src.core.adb_shell import ShellChannel
+
+
+class ShellServer:
+    """Локальная замена adbd: `sh` на каждое TCP соединение.
+
+    `exec` - как `adb shell <команда>`: первая строка соединения выполняется
+    через `sh -c`, вывод отдается до закрытия. `session` - как `shell:sh`:
+    stdin и stdout соединения подключены к долгоживущему `sh`.
+    """
+
+    def __init__(self, mode: str = "session") -> None:
+        self.mode = mode
+        self._socket = socket.create_server(("127.0.0.1", 0))
+        self.address: Tuple[str, int] = self._socket.getsockname()
+        self._thread = threading.Thread(target=self._serve, name=f"ShellServer-{mode}", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            with connection:
+                # Вывод sh приходит мелкими записями, с Nagle они ждали бы отложенного ACK клиента
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if self.mode == "session":
+                    subprocess.Popen(["sh"], stdin=connection, stdout=connection, stderr=subprocess.STDOUT)
+                    continue
+                command = connection.makefile("rb").readline().decode()
+                subprocess.Popen(
+                    ["sh", "-c", command], stdin=subprocess.DEVNULL, stdout=connection, stderr=subprocess.STDOUT
+                )
+
+    def connect(self) -> socket.socket:
+        return socket.create_connection(self.address)
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+class ExecClient:
+    """Путь `device.shell()`: новое соединение и процесс на каждую команду."""
+
+    def __init__(self, server: ShellServer) -> None:
+        self.server = server
+
+    def shell(self, command: str) -> bytes:
+        chunks = []
+        with self.server.connect() as sock:
+            sock.sendall(f"{command}\n".encode())
+            while chunk := sock.recv(4096):
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+
+def session_client(server: ShellServer) -> ShellChannel:
+    return ShellChannel(device=SimpleNamespace(serial="bench"), connect=server.connect)
@@ -0,0 +1,271 @@
+"""Набор бенчмарков горячих путей: изображения, OCR, селекторы, кадры, shell и сохранение рекламы.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite                  # замер и вывод таблицы
+    python -m benchmarks.suite --save           # сохранить базовую линию
+    python -m benchmarks.suite --compare        # сравнить с базовой линией, код 1 при регрессии
+    python -m benchmarks.suite -k selectors     # только сценарии с подстрокой в имени
+    python -m benchmarks.suite -k ocr --save    # обновить в базовой линии только эти сценарии
+
+Базовая линия зависит от машины, поэтому сравнивать имеет смысл только
+замеры, снятые на той же машине, что и benchmarks/baseline.json.
+"""
+import sys
+import shutil
+import argparse
+import tempfile
+import pytesseract
+
+from PIL import Image
+from lxml import etree
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from src.utils.ocr import Tesseract
+from src.core.models import AdParseResult
+from src.utils.image_utils import ImageUtils
+from src.youtube.save_ad import SaveAdManager
+from src.core.parser_config import ParserConfig
+from src.core.selector_compiler import compile_chain
+from benchmarks.bench_selectors import collect_chains
+from benchmarks.shell_server import ExecClient, ShellServer, session_client
+from benchmarks.screencap_server import FrameServer, JpegClient, raw_client
+from benchmarks.frames import make_ad_crop, make_feed_frame
+from benchmarks.harness import BenchResult, measure, print_results, save_baseline
+from benchmarks.harness import compare_baseline, load_baseline, missing_baseline
+
+
+FIXTURES_PATH = Path(__file__).resolve().parent.parent / "fixtures"
+CONTENT_REGION = (0, 820, 1080, 2400)
+OCR_SCALES = (None, 2, 4, 8)
+RETRIES = 2
+
+Case = Tuple[str, Callable[[], object], int]
+
+
+def image_cases() -> List[Case]:
+    base = make_feed_frame()
+    scrolled = make_feed_frame(offset=120)
+    ad_image = base.crop((0, 820, 1080, 1428))
+    ad_text = make_ad_crop()
+    threshold = ParserConfig.screenshot_similarity_threshold
+    return [
+        ("image: compare_images 1080x2400", lambda: ImageUtils.compare_images(base, scrolled), 5),
+        ("image: compare_images_fast 1080x2400", lambda: ImageUtils.compare_images_fast(base, scrolled), 30),
+        (
+            "image: compare_images_fast область+порог",
+            lambda: ImageUtils.compare_images_fast(base, scrolled, region=CONTENT_REGION, threshold=threshold),
+            100
+        ),
+        (
+            "image: combine_images_vertically",
+            lambda: ImageUtils.combine_images_vertically(top_img=ad_image, bottom_img=ad_text),
+            100
+        ),
+        ("image: dhash 1080x608", lambda: ImageUtils.dhash(ad_image, hash_size=ParserConfig.ad_image_hash_size), 100),
+    ]
+
+
+def tesseract_available() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except (pytesseract.TesseractNotFoundError, OSError):
+        return False
+
+
+def ocr_cases() -> List[Case]:
+    if not tesseract_available():
+        print("tesseract не найден, сценарии OCR пропущены")
+        return []
+
+    crop = make_ad_crop()
+    cases = []
+    for scale in OCR_SCALES:
+        cases.append((
+            f"ocr: get_screen_data scale={scale}",
+            lambda scale=scale: Tesseract.get_screen_data(image=crop, lang="eng", scale=scale),
+            10
+        ))
+        cases.append((
+            f"ocr: find_matches_by_word scale={scale}",
+            lambda scale=scale: Tesseract.find_matches_by_word(lang="eng", image=crop, target_word="Sponsored", scale=scale),
+            10
+        ))
+    return cases
+
+
+def selector_cases() -> List[Case]:
+    chains = [compile_chain(selectors) for selectors in collect_chains().values()]
+    dumps = sorted(FIXTURES_PATH.joinpath("hierarchy").glob("*.xml"))
+    dumps += sorted(FIXTURES_PATH.joinpath("replay").glob("*/hierarchy/watch*.xml"))
+
+    cases = []
+    for path in dumps:
+        data = path.read_bytes()
+        root = etree.fromstring(data)
+        cases.append((f"selectors: разбор {path.name}", lambda data=data: etree.fromstring(data), 200))
+        cases.append((
+            f"selectors: {len(chains)} цепочек {path.name}",
+            lambda root=root: [xpath(root) for xpath in chains],
+            200
+        ))
+    return cases
+
+
+def screencap_cases() -> Tuple[List[Case], List[Callable[[], None]]]:
+    frame = make_feed_frame()
+    jpeg_server, raw_server = FrameServer(frame, mode="jpeg"), FrameServer(frame, mode="raw")
+    jpeg, raw = JpegClient(jpeg_server), raw_client(raw_server)
+    left, top, right, bottom = CONTENT_REGION
+    strip = (top, top + 400)
+
+    cases = [
+        ("screencap: uiautomator JPEG кадр 1080x2400", jpeg.capture, 20),
+        ("screencap: raw кадр 1080x2400", raw.capture_raw, 20),
+        (
+            "screencap: uiautomator JPEG кадр + полоса",
+            lambda: Image.fromarray(jpeg.capture()[strip[0]:strip[1], left:right]),
+            20
+        ),
+        (
+            "screencap: raw кадр + полоса",
+            lambda: (raw.capture_raw(), raw.crop((left, strip[0], right, strip[1]))),
+            20
+        ),
+    ]
+    return cases, [jpeg_server.close, raw_server.close]
+
+
+def shell_cases() -> Tuple[List[Case], List[Callable[[], None]]]:
+    exec_server, session_server = ShellServer(mode="exec"), ShellServer(mode="session")
+    exec_client, session = ExecClient(exec_server), session_client(session_server)
+    # Команды настройки устройства из MobileSettings.configure, `true` вместо `am start` на каждую ссылку
+    setup = ["settings put system user_rotation 0", "cmd notification set_dnd on"]
+
+    cases = [
+        ("shell: exec на команду", lambda: exec_client.shell("true"), 100),
+        ("shell: постоянная сессия", lambda: session.run("true"), 100),
+        ("shell: настройка, exec на команду", lambda: [exec_client.shell(command) for command in setup], 50),
+        ("shell: настройка, пакет в сессии", lambda: session.batch(setup), 50),
+    ]
+    return cases, [session.close, exec_server.close, session_server.close]
+
+
+class SaveBench:
+    def __init__(self) -> None:
+        self.path = Path(tempfile.mkdtemp(prefix="bench_save_"))
+        self.manager = SaveAdManager(
+            serial="bench", save_path=str(self.path), config_path=str(self.path.joinpath("configs.json"))
+        )
+        self.counter = 0
+        ad_image = make_feed_frame().crop((0, 820, 1080, 1428))
+        self.image = ImageUtils.combine_images_vertically(top_img=ad_image, bottom_img=make_ad_crop())
+
+    def result(self) -> AdParseResult:
+        self.counter += 1
+        return AdParseResult(
+            url=f"https://example.com/{self.counter}", text="Example Store", image=self.image, image_hash=f"{self.counter:016x}"
+        )
+
+    def enqueue(self) -> None:
+        self.manager.save_ad_info(self.result(), source_link="https://youtu.be/bench")
+
+    def enqueue_and_flush(self) -> None:
+        self.enqueue()
+        self.manager.flush()
+
+    def close(self) -> None:
+        self.manager.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def collect(pattern: str) -> Tuple[Dict[str, Callable[[], BenchResult]], List[Callable[[], None]]]:
+    """Сценарии, отобранные по подстроке, и функции их очистки."""
+    benches: Dict[str, Callable[[], BenchResult]] = {}
+    cleanups: List[Callable[[], None]] = []
+    for name, func, number in image_cases() + ocr_cases() + selector_cases():
+        if pattern in name:
+            benches[name] = lambda name=name, func=func, number=number: measure(name, func, number=number)
+
+    for prefix, make_cases in (("screencap", screencap_cases), ("shell", shell_cases)):
+        if prefix in pattern or pattern in f"{prefix}: ":
+            cases, closers = make_cases()
+            cleanups.extend(closers)
+            for name, func, number in cases:
+                if pattern in name:
+                    benches[name] = lambda name=name, func=func, number=number: measure(name, func, number=number)
+
+    if pattern in "save: save_ad_info":
+        bench = SaveBench()
+        cleanups.append(bench.close)
+        # Очередь ограничена, поэтому замер постановки в очередь идет пачками меньше ее размера
+        enqueue_name = "save: save_ad_info постановка в очередь"
+        benches[enqueue_name] = lambda: measure(
+            enqueue_name, bench.enqueue,
+            number=ParserConfig.save_queue_size // 2, warmup=0, setup=bench.manager.flush, min_time=0
+        )
+        write_name = "save: save_ad_info + запись (png)"
+        benches[write_name] = lambda: measure(write_name, bench.enqueue_and_flush, number=30, min_time=0)
+    return benches, cleanups
+
+
+def best_of(first: BenchResult, second: BenchResult) -> BenchResult:
+    return first if first.p50_ms <= second.p50_ms else second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей парсера")
+    parser.add_argument("-k", "--filter", default="", help="Подстрока имени сценария")
+    parser.add_argument("--save", action="store_true", help="Сохранить результаты как базовую линию")
+    parser.add_argument("--compare", action="store_true", help="Сравнить с базовой линией")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5,
+        help="Допустимый рост p50 и памяти (доля), на выделенной машине можно уменьшить до 0.2"
+    )
+    args = parser.parse_args()
+
+    benches, cleanups = collect(args.filter)
+    try:
+        results = {name: bench() for name, bench in benches.items()}
+
+        if args.compare:
+            # Подозрительные сценарии перемеряются, чтобы случайная нагрузка на машину не давала ложных регрессий
+            for _ in range(RETRIES):
+                regressions = compare_baseline(list(results.values()), tolerance=args.tolerance)
+                flagged = [name for name in results if any(regression.startswith(f"{name}:") for regression in regressions)]
+                for name in flagged:
+                    results[name] = best_of(results[name], benches[name]())
+    finally:
+        for cleanup in cleanups:
+            cleanup()
+
+    results = list(results.values())
+    print_results(results)
+
+    if args.save:
+        save_baseline(results)
+        print("Базовая линия сохранена")
+
+    if args.compare:
+        regressions = compare_baseline(results, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}")
+
+        # Новый сценарий без базовой линии не должен молча проходить сравнение
+        missing = missing_baseline(results)
+        for name in missing:
+            print(f"НЕТ БАЗОВОЙ ЛИНИИ {name}, сохраните ее через --save")
+
+        measured = {result.name for result in results}
+        for name in load_baseline():
+            if args.filter in name and name not in measured:
+                print(f"ПРЕДУПРЕЖДЕНИЕ {name} есть в базовой линии, но не замерен")
+
+        if regressions or missing:
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
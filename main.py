@@ -6,11 +6,24 @@ from pathlib import Path
 from datetime import datetime
 from argparse import Namespace
 from uiautomator2 import Device
-from typing import List, Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
-from multiprocessing import Process
 
+from src.replay.fake_device import FakeDevice
+from src.replay.recorder import SessionRecorder
+from src.core.progress_journal import ProgressJournal
 from src.youtube.youtube_parser import YoutubeParser
+from src.utils.tracing import tracer
+from src.utils.ocr_cache import OcrCache
+from src.utils.ocr_service import OcrClient, OcrService
+from src.core import heartbeat
+from src.core.heartbeat import Heartbeat
+from src.core.supervisor import Supervisor
+from src.core.parser_config import ParserConfig
+from src.core.screencap import FRAME_SOURCES
+from src.core.device_discovery import DeviceDiscovery
+from src.core.link_loader import LinkLoader
+from src.core.link_dispatcher import LinkDispatcher, LinkQueue
 
 
 logging.basicConfig(
@@ -37,6 +50,61 @@ def parse_args() -> Namespace:
         help="Список серийных номеров устройств",
         required=True
     )
+    parser.add_argument(
+        "-m", "--mirror",
+        action="store_true",
+        help="Каждое устройство обрабатывает все ссылки (вместо общей очереди)"
+    )
+    parser.add_argument(
+        "--ocr-workers",
+        type=int,
+        default=2,
+        help="Количество процессов tesseract в общем OCR сервисе (0 - распознавать в процессе устройства)"
+    )
+    parser.add_argument(
+        "--ocr-batch",
+        type=int,
+        default=4,
+        help="Максимальное количество изображений в одном запуске tesseract"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Записывать спаны этапов в results/traces/<время запуска>.jsonl"
+    )
+    parser.add_argument(
+        "--replay",
+        help="Каталог или zip записанной сессии: вместо телефонов используются FakeDevice с именами из --serials"
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=1.0,
+        help="Множитель записанных задержек устройства в режиме воспроизведения (0 - без задержек)"
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Записывать сессии выборки ссылок в results/sessions для последующего воспроизведения"
+    )
+    parser.add_argument(
+        "--record-rate",
+        type=int,
+        default=100,
+        help="Записывается примерно одна ссылка из N (1 - все ссылки)"
+    )
+    parser.add_argument(
+        "--screencap",
+        nargs="+",
+        default=[ParserConfig.screencap_backend],
+        metavar="[SERIAL=]BACKEND",
+        help="Способ получения кадра: uiautomator (JPEG по HTTP) или raw (screencap по adb), для всех или отдельных устройств"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Не пропускать ссылки, уже отмеченные в журнале прогресса results/progress"
+    )
     return parser.parse_args()
 
 
@@ -48,6 +116,7 @@ def get_adb_devices() -> List[Optional[DeviceInfo]]:
             text=True,
             encoding="utf-8",
             capture_output=True,
+            timeout=ParserConfig.adb_timeout,
         )
         
         devices = []
@@ -76,26 +145,63 @@ def get_adb_devices() -> List[Optional[DeviceInfo]]:
         return []
     
 
-def worker(serial: str, links: List[str]) -> None:
+def worker(
+    serial: str,
+    links: LinkQueue,
+    ocr: Optional[OcrClient] = None,
+    trace_path: Optional[str] = None,
+    replay: Optional[str] = None,
+    replay_latency: float = 1.0,
+    record_rate: Optional[int] = None,
+    beat: Optional[Heartbeat] = None,
+    screencap: str = ParserConfig.screencap_backend,
+) -> None:
     """Рабочая функция для каждого процесса."""
     logger.info(f"[{serial}] Запуск worker процесса")
     start_time = datetime.now()
+    if trace_path:
+        tracer.configure(path=trace_path, serial=serial)
+    if beat:
+        heartbeat.install(beat)
     
     try:
-        device = Device(serial=serial)
-        parser = YoutubeParser(device=device)
-        parser.run(links=links)
+        if replay:
+            device = FakeDevice(session=replay, serial=serial, latency_scale=replay_latency)
+        else:
+            device = Device(serial=serial)
+        if (replay or record_rate) and screencap != "uiautomator":
+            # Кадры raw screencap идут мимо записи, а у FakeDevice нет adb
+            logger.warning(f"[{serial}] Raw screencap недоступен при записи и воспроизведении сессий")
+            screencap = "uiautomator"
+        if record_rate:
+            device = SessionRecorder(device=device, sample_rate=record_rate)
+        parser = YoutubeParser(device=device, ocr=ocr, journal=ProgressJournal(serial=serial), screencap=screencap)
+        parser.run(links=beat.track(links) if beat else links)
     except Exception as e:
         logger.error(f"[{serial}] Ошибка в worker процессе: {str(e)}", exc_info=True)
     finally:
+        tracer.close()
         duration = datetime.now() - start_time
         logger.info(f"[{serial}] Worker процесс завершен. Время работы: {duration}")
 
 
+def parse_screencap(values: List[str]) -> Dict[str, str]:
+    """Разбирает `--screencap raw` и `--screencap SERIAL=raw` в словарь, ключ None - для всех."""
+    backends: Dict[Optional[str], str] = {}
+    for value in values:
+        serial, _, backend = value.rpartition("=")
+        if backend not in FRAME_SOURCES:
+            logger.error(f"Неизвестный способ получения кадра: {backend}")
+            exit(1)
+        backends[serial or None] = backend
+    return backends
+
+
 def main():
     """Основная функция приложения."""
     args = parse_args()
     links_file = Path("links.txt")
+    screencap = parse_screencap(args.screencap)
     
     logger.info("Запуск приложения YouTube Parser")
     
@@ -104,15 +210,24 @@ def main():
         logger.error("Файл links.txt не найден в рабочей директории")
         exit(1)
         
-    logger.info("Получение списка подключенных устройств...")
-    connected_devices = get_adb_devices()
-    
+    serials = list(dict.fromkeys(args.serials))
     valid_serials = []
-    for serial in args.serials:
-        if serial not in [d.serial for d in connected_devices]:
-            logger.error(f"Устройство {serial} не подключено или не найдено!")
-        else:
-            valid_serials.append(serial)
+    discovery = None
+    if args.replay:
+        logger.info(f"Режим воспроизведения сессии: {args.replay}")
+        valid_serials = list(serials)
+    else:
+        logger.info("Получение списка подключенных устройств...")
+        connected_devices = get_adb_devices()
+
+        for serial in serials:
+            if serial not in [d.serial for d in connected_devices]:
+                logger.warning(f"Устройство {serial} не подключено или не найдено!")
+            else:
+                valid_serials.append(serial)
+
+        # Остальные устройства из --serials подключаются по ходу работы
+        discovery = DeviceDiscovery(list_devices=get_adb_devices, serials=serials)
     
     if not valid_serials:
         logger.error("Нет доступных устройств для работы. Выход.")
@@ -120,47 +235,79 @@ def main():
 
     logger.info(f"Устройства для обработки: {valid_serials}")
 
-    try:
-        with open(links_file, "r") as f:
-            links = [line.strip() for line in f if line.strip()]
-            logger.info(f"Загружено {len(links)} ссылок из файла")
-    except Exception as e:
-        logger.error(f"Ошибка при чтении файла links.txt: {str(e)}")
-        exit(1)
+    start_time = datetime.now()
 
-    if not links:
-        logger.error("Файл links.txt пуст")
-        exit(1)
+    trace_path = None
+    if args.trace:
+        trace_path = str(Path("results", "traces", f"{start_time:%Y%m%d_%H%M%S}.jsonl"))
+        logger.info(f"Трассировка включена: {trace_path}")
 
-    processes = []
-    start_time = datetime.now()
+    skip = None
+    if not args.no_resume:
+        completed = ProgressJournal.load_completed()
+        if completed:
+            logger.info(f"Журнал прогресса: уже обработано ссылок: {len(completed)}")
+            # В режиме общей очереди ссылка готова, если ее обработало любое устройство
+            skip = lambda serial, link: link in completed and (serial is None or serial in completed[link])
+
+    # Файл читается потоково по мере освобождения очереди, дубликаты видео отсеиваются при чтении
+    dispatcher = LinkDispatcher(serials=serials, mirror=args.mirror)
+    dispatcher.dispatch(lambda skip_link: LinkLoader(path=links_file, skip=skip_link), skip=skip)
+    if args.mirror:
+        logger.info("Режим зеркалирования: каждое устройство обработает все ссылки")
+    else:
+        logger.info("Режим общей очереди: ссылки распределяются между устройствами")
+
+    ocr_service = None
+    if args.ocr_workers > 0:
+        ocr_service = OcrService(
+            client_ids=serials,
+            workers=args.ocr_workers,
+            batch_size=args.ocr_batch,
+            cache=OcrCache()
+        )
+        ocr_service.start()
+
+    supervisor = Supervisor(
+        dispatcher=dispatcher,
+        target=worker,
+        args=lambda serial, links, beat: (
+            serial,
+            links,
+            ocr_service.client(serial) if ocr_service else None,
+            trace_path,
+            args.replay,
+            args.replay_latency,
+            args.record_rate if args.record else None,
+            beat,
+            screencap.get(serial, screencap.get(None, ParserConfig.screencap_backend))
+        ),
+        discovery=discovery
+    )
 
     try:
         logger.info("Запуск процессов для устройств...")
-        for serial in valid_serials:
+        for serial in serials:
             logger.info(f"Создание процесса для устройства {serial}")
-            process = Process(
-                name=f"Device-{serial}",
-                target=worker,
-                args=(serial, links),
-                daemon=True
-            )
-            processes.append(process)
-            process.start()
-            logger.debug(f"Процесс для устройства {serial} запущен")
+            supervisor.add(serial, attached=serial in valid_serials)
+        if discovery:
+            discovery.start(present=valid_serials)
 
+        # Упавшие и зависшие процессы перезапускаются, пока очереди не будут обработаны
         logger.info("Ожидание завершения процессов...")
-        for process in processes:
-            process.join()
-            logger.debug(f"Процесс {process.name} завершил работу")
+        supervisor.run()
 
     except KeyboardInterrupt:
         logger.warning("Получен сигнал прерывания. Завершение процессов...")
-        for process in processes:
-            process.terminate()
+        supervisor.stop()
     except Exception as e:
         logger.error(f"Критическая ошибка: {str(e)}", exc_info=True)
     finally:
+        if discovery:
+            discovery.stop()
+        dispatcher.close()
+        if ocr_service:
+            ocr_service.stop()
         duration = datetime.now() - start_time
         logger.info(f"Все процессы завершены. Общее время работы: {duration}")
 
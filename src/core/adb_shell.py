@@ -0,0 +1,137 @@
+import time
+import shlex
+import socket
+import logging
+
+from uiautomator2 import Device, ShellResponse
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from src.core.parser_config import ParserConfig
+
+
+logger = logging.getLogger(__name__)
+
+Command = Union[str, List[str]]
+
+
+def command_event(command: Command) -> Tuple[Optional[str], Optional[str]]:
+    """Событие сессии воспроизведения для команды shell и ссылка для `open_link`."""
+    args = shlex.split(command) if isinstance(command, str) else list(command)
+    if args[:2] == ["am", "start"] and "-d" in args[:-1]:
+        return "open_link", args[args.index("-d") + 1]
+    if args[:2] == ["monkey", "-p"]:
+        return "app_start", None
+    if args[:2] == ["am", "force-stop"]:
+        return "app_stop", None
+    return None, None
+
+
+class ShellChannel:
+    """Долгоживущая сессия `sh` на устройстве для коротких команд.
+
+    Команды пишутся в stdin одной сессии, за каждой печатается маркер с
+    кодом возврата, по которому отделяется ее вывод, поэтому отдельная exec
+    сессия adb на команду не открывается. `batch()` отправляет несколько
+    команд за один обмен. При обрыве сессия открывается заново при следующей
+    команде, а неотвеченные команды и команды в течение `reconnect_delay`
+    после неудачного подключения выполняются через `device.shell()`.
+
+    FakeDevice и SessionRecorder всегда работают через `device.shell()`,
+    чтобы команды видели воспроизведение и запись сессии.
+    """
+
+    MARKER: str = "__shell_done__"
+
+    def __init__(
+        self,
+        device: Device,
+        connect: Optional[Callable[[], socket.socket]] = None,
+        timeout: float = ParserConfig.shell_timeout,
+        reconnect_delay: float = ParserConfig.shell_reconnect_delay,
+    ) -> None:
+        self.device = device
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        if connect is None and isinstance(device, Device):
+            connect = self._adb_connect
+        self._connect = connect
+        self._sock: Optional[socket.socket] = None
+        self._buffer = b""
+        self._counter = 0
+        self._failed_at: Optional[float] = None
+
+    def _adb_connect(self) -> socket.socket:
+        transport = self.device.adb_device.open_transport(timeout=self.timeout)
+        transport.send_command("shell:sh")
+        transport.check_okay()
+        return transport.conn
+
+    def _channel(self) -> Optional[socket.socket]:
+        if self._sock is not None or self._connect is None:
+            return self._sock
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.reconnect_delay:
+            return None
+
+        try:
+            self._sock = self._connect()
+            self._sock.settimeout(self.timeout)
+            self._buffer = b""
+            self._failed_at = None
+        except Exception as e:
+            logger.warning(f"[{self.device.serial}] - Не удалось открыть shell сессию, команды идут через adb exec: {str(e)}")
+            self._failed_at = time.monotonic()
+        return self._sock
+
+    def _read_response(self, sock: socket.socket, marker: str) -> ShellResponse:
+        tag = f"\n{marker} ".encode()
+        while True:
+            index = self._buffer.find(tag)
+            end = self._buffer.find(b"\n", index + len(tag)) if index >= 0 else -1
+            if end >= 0:
+                output = self._buffer[:index].decode("utf-8", errors="replace")
+                exit_code = int(self._buffer[index + len(tag):end])
+                self._buffer = self._buffer[end + 1:]
+                return ShellResponse(output=output, exit_code=exit_code)
+
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("shell сессия закрыта устройством")
+            self._buffer += chunk
+
+    def _exchange(self, sock: socket.socket, commands: List[str], responses: List[ShellResponse]) -> None:
+        markers, payload = [], []
+        for command in commands:
+            self._counter += 1
+            marker = f"{self.MARKER}{self._counter}"
+            markers.append(marker)
+            # stdin команды закрыт, иначе она может прочитать следующие команды сессии
+            payload.append(f"{command} </dev/null 2>&1; printf '\\n{marker} %d\\n' $?\n")
+        sock.sendall("".join(payload).encode())
+        for marker in markers:
+            responses.append(self._read_response(sock, marker))
+
+    def batch(self, commands: Sequence[Command]) -> List[ShellResponse]:
+        """Выполняет команды по порядку за один обмен с устройством."""
+        commands = [command if isinstance(command, str) else shlex.join(command) for command in commands]
+        responses: List[ShellResponse] = []
+        sock = self._channel()
+        if sock is not None:
+            try:
+                self._exchange(sock, commands, responses)
+                return responses
+            except (OSError, ValueError) as e:
+                logger.warning(f"[{self.device.serial}] - Shell сессия прервана: {str(e)}")
+                self.close()
+
+        return responses + [self.device.shell(command) for command in commands[len(responses):]]
+
+    def run(self, command: Command) -> ShellResponse:
+        return self.batch([command])[0]
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
@@ -0,0 +1,75 @@
+import logging
+import threading
+
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+from src.core.parser_config import ParserConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceDiscovery:
+    """Фоновый опрос `adb devices` для подключения телефонов на ходу.
+
+    Учитываются только разрешенные серийные номера в состоянии `device`.
+    Устройство считается отключенным, только если его нет в
+    `missing_polls` опросах подряд: так сбой одного запуска adb или
+    короткое переподключение кабеля не останавливают процесс устройства.
+    """
+
+    def __init__(
+        self,
+        list_devices: Callable[[], List[Any]],
+        serials: Iterable[str],
+        interval: float = ParserConfig.device_poll_interval,
+        missing_polls: int = ParserConfig.device_missing_polls,
+    ) -> None:
+        self.list_devices = list_devices
+        self.serials = set(serials)
+        self.interval = interval
+        self.missing_polls = missing_polls
+
+        self._missing: Dict[str, int] = {}
+        self._present: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="DeviceDiscovery", daemon=True)
+
+    @property
+    def present(self) -> Set[str]:
+        with self._lock:
+            return set(self._present)
+
+    def start(self, present: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._present = set(present) & self.serials
+        self._thread.start()
+
+    def poll(self) -> None:
+        connected = {device.serial for device in self.list_devices() if device.status == "device"}
+        with self._lock:
+            for serial in self.serials:
+                if serial in connected:
+                    self._missing.pop(serial, None)
+                    if serial not in self._present:
+                        logger.info(f"[{serial}] - Устройство подключено")
+                        self._present.add(serial)
+                elif serial in self._present:
+                    self._missing[serial] = self._missing.get(serial, 0) + 1
+                    if self._missing[serial] >= self.missing_polls:
+                        logger.warning(f"[{serial}] - Устройство отключено")
+                        self._present.discard(serial)
+                        self._missing.pop(serial)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Ошибка опроса устройств: {str(e)}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.interval)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from typing import Optional, Tuple, Union
+from uiautomator2 import Device
+from PIL.Image import Image as PILImage
+
+from src.core.hierarchy import HierarchySnapshot
+from src.core.screencap import DeviceScreenshot, RawScreencap, clamp_box
+
+
+class FrameCache:
+    """Кэш полного кадра экрана на одно состояние UI.
+
+    Состояние определяется счетчиком поколений снимка иерархии, который
+    увеличивается при каждом действии ввода, поэтому все обрезки одного
+    состояния берутся из одного скриншота. Кадр снимает `source`
+    (см. `src.core.screencap`), массивы из `view()` действительны только
+    до следующего кадра, изображения из `crop()` и `screenshot()` - копии.
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        snapshot: HierarchySnapshot,
+        source: Optional[Union[DeviceScreenshot, RawScreencap]] = None,
+    ) -> None:
+        self.device = device
+        self.snapshot = snapshot
+        self.source = source or DeviceScreenshot(device)
+        self._frame: Optional[np.ndarray] = None
+        self._frame_generation = -1
+
+    @property
+    def frame(self) -> np.ndarray:
+        if self._frame is None or self._frame_generation != self.snapshot.generation:
+            self._frame = self.source.capture()
+            self._frame_generation = self.snapshot.generation
+        return self._frame
+
+    def set_source(self, source: Union[DeviceScreenshot, RawScreencap]) -> None:
+        self.source = source
+        self._frame = None
+
+    def screenshot(self) -> PILImage:
+        height, width = self.frame.shape[:2]
+        return self.source.crop((0, 0, width, height))
+
+    def view(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        frame = self.frame
+        left, top, right, bottom = clamp_box(box, frame.shape[1], frame.shape[0])
+        return frame[top:bottom, left:right]
+
+    def crop(self, box: Tuple[int, int, int, int]) -> PILImage:
+        # Обращение к кадру снимает новый, если состояние UI изменилось
+        self.frame
+        return self.source.crop(box)
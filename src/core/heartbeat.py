@@ -0,0 +1,82 @@
+import time
+import ctypes
+
+from multiprocessing import Array, Value
+from typing import Iterable, Iterator, Optional
+
+
+class Heartbeat:
+    """Общее с супервизором состояние процесса устройства.
+
+    Время последнего сигнала, текущая ссылка и запрос остановки лежат в
+    разделяемой памяти, поэтому супервизор видит их без обмена сообщениями.
+    Сигнал подается из основного потока воркера на каждом шаге работы, так
+    что зависший RPC останавливает и его.
+    """
+
+    LINK_SIZE: int = 4096
+
+    def __init__(self) -> None:
+        self._last = Value(ctypes.c_double, 0.0, lock=False)
+        self._link = Array(ctypes.c_char, self.LINK_SIZE, lock=False)
+        self._stop = Value(ctypes.c_bool, False, lock=False)
+
+    def beat(self) -> None:
+        self._last.value = time.time()
+
+    def age(self) -> float:
+        return time.time() - self._last.value
+
+    @property
+    def link(self) -> Optional[str]:
+        value = self._link.value
+        return value.decode("utf-8") if value else None
+
+    @link.setter
+    def link(self, link: Optional[str]) -> None:
+        self._link.value = (link or "").encode("utf-8")[:self.LINK_SIZE - 1]
+
+    def request_stop(self) -> None:
+        self._stop.value = True
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop.value
+
+    def reset(self) -> None:
+        self.link = None
+        self._stop.value = False
+        self.beat()
+
+    def track(self, links: Iterable[str]) -> Iterator[str]:
+        """Отмечает выданную ссылку как текущую, пока она обрабатывается.
+
+        После `request_stop()` текущая ссылка дорабатывается, а следующая
+        уже не берется из очереди.
+        """
+        iterator = iter(links)
+        # Флаг проверяется до чтения из очереди, иначе взятая ссылка потеряется
+        while not self.stop_requested:
+            link = next(iterator, None)
+            if link is None:
+                return
+            self.link = link
+            self.beat()
+            yield link
+            task_done = getattr(links, "task_done", None)
+            if task_done:
+                task_done()
+            self.link = None
+
+
+_active: Optional[Heartbeat] = None
+
+
+def install(heartbeat: Optional[Heartbeat]) -> None:
+    global _active
+    _active = heartbeat
+
+
+def beat() -> None:
+    if _active is not None:
+        _active.beat()
@@ -0,0 +1,155 @@
+import re
+
+from lxml import etree
+from uiautomator2 import Device, UiObjectNotFoundError
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.selector_compiler import compile_chain
+
+
+Selector = Dict[str, Any]
+Bounds = Tuple[int, int, int, int]
+
+_BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def parse_bounds(bounds: Optional[str]) -> Bounds:
+    match = _BOUNDS_PATTERN.fullmatch(bounds or "")
+    if match is None:
+        return (0, 0, 0, 0)
+    return tuple(int(value) for value in match.groups())
+
+
+class HierarchySnapshot:
+    """Разобранный дамп иерархии, общий для всех запросов одного шага UI.
+
+    Дамп снимается лениво при первом запросе и живет до вызова
+    `invalidate()`, который нужно делать после каждого клика, свайпа
+    или нажатия клавиши.
+    """
+
+    def __init__(self, device: Device) -> None:
+        self.device = device
+        self.generation = 0
+        self._root: Optional[etree._Element] = None
+        self._root_generation = -1
+
+    @property
+    def root(self) -> etree._Element:
+        if self._root is None or self._root_generation != self.generation:
+            xml = self.device.dump_hierarchy()
+            self._root = etree.fromstring(xml.encode("utf-8"))
+            self._root_generation = self.generation
+        return self._root
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._root = None
+
+    def find(self, selectors: Tuple[Selector, ...], start: Optional[etree._Element] = None) -> List[etree._Element]:
+        return compile_chain(selectors)(self.root if start is None else start)
+
+    def __call__(self, **selector: Any) -> 'SnapshotNode':
+        return SnapshotNode(snapshot=self, selectors=(selector,))
+
+
+class SnapshotNode:
+    """Аналог UiObject только для чтения, отвечающий из снимка иерархии."""
+
+    def __init__(
+        self,
+        snapshot: HierarchySnapshot,
+        selectors: Tuple[Selector, ...] = (),
+        instance: Optional[int] = None,
+        start: Optional[etree._Element] = None,
+    ) -> None:
+        self.snapshot = snapshot
+        self.selectors = selectors
+        self.instance = instance
+        self.start = start
+
+        # Компиляция цепочки один раз при создании узла, дальше берется из кэша
+        if self.selectors:
+            compile_chain(self.selectors)
+
+    def _find(self) -> List[etree._Element]:
+        if self.start is not None and not self.selectors:
+            return [self.start]
+
+        elements = self.snapshot.find(self.selectors, start=self.start)
+        if self.instance is None:
+            return elements
+        if -len(elements) <= self.instance < len(elements):
+            return [elements[self.instance]]
+        return []
+
+    @property
+    def element(self) -> etree._Element:
+        elements = self._find()
+        if not elements:
+            raise UiObjectNotFoundError({"code": -32002, "data": str(self.selectors), "method": "snapshot"})
+        return elements[0]
+
+    @property
+    def exists(self) -> bool:
+        return bool(self._find())
+
+    @property
+    def count(self) -> int:
+        return len(self._find())
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        element = self.element
+        left, top, right, bottom = parse_bounds(element.get("bounds"))
+        bounds = {"left": left, "top": top, "right": right, "bottom": bottom}
+        return {
+            "bounds": bounds,
+            "visibleBounds": bounds,
+            "childCount": len(element.findall("node")),
+            "className": element.get("class", ""),
+            "contentDescription": element.get("content-desc", ""),
+            "packageName": element.get("package", ""),
+            "resourceName": element.get("resource-id", ""),
+            "text": element.get("text", ""),
+            "clickable": element.get("clickable") == "true",
+            "enabled": element.get("enabled") == "true",
+            "scrollable": element.get("scrollable") == "true",
+            "selected": element.get("selected") == "true",
+        }
+
+    def bounds(self) -> Bounds:
+        return parse_bounds(self.element.get("bounds"))
+
+    def center(self, offset: Tuple[float, float] = (0.5, 0.5)) -> Tuple[float, float]:
+        left, top, right, bottom = self.bounds()
+        return (left + (right - left) * offset[0], top + (bottom - top) * offset[1])
+
+    def get_text(self) -> str:
+        return self.element.get("text", "")
+
+    def child(self, **selector: Any) -> 'SnapshotNode':
+        if self.instance is not None:
+            return type(self)(snapshot=self.snapshot, selectors=(selector,), start=self.element)
+        return type(self)(
+            snapshot=self.snapshot,
+            selectors=self.selectors + (selector,),
+            start=self.start
+        )
+
+    def children(self) -> List['SnapshotNode']:
+        return [
+            type(self)(snapshot=self.snapshot, start=child)
+            for child in self.element.iterchildren("node")
+        ]
+
+    def __getitem__(self, instance: int) -> 'SnapshotNode':
+        return type(self)(
+            snapshot=self.snapshot,
+            selectors=self.selectors,
+            instance=instance,
+            start=self.start
+        )
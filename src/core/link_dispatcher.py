@@ -0,0 +1,152 @@
+import queue
+import logging
+import threading
+
+from multiprocessing import Queue, Value
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.core import heartbeat
+from src.core.parser_config import ParserConfig
+
+
+logger = logging.getLogger(__name__)
+
+LinkSource = Callable[[Optional[Callable[[str], bool]]], Iterable[str]]
+
+
+class LinkQueue:
+    """Ограниченная очередь ссылок с учетом выданных и обработанных.
+
+    Стоп-маркеры кладутся не подающим потоком, а через `finish()`, когда
+    все поданные ссылки обработаны. Так ссылка, возвращенная в очередь
+    после падения процесса, не окажется за стоп-маркерами.
+    """
+
+    _STOP: Optional[str] = None
+
+    def __init__(self, maxsize: int = ParserConfig.link_queue_size) -> None:
+        self._queue: Queue = Queue(maxsize=maxsize)
+        self._completed = Value("q", 0)
+        self.sent = 0
+        self.fed = False
+        self.finished = False
+
+    def put(self, link: str, block: bool = True) -> bool:
+        try:
+            self._queue.put(link, block=block)
+            return True
+        except queue.Full:
+            return False
+
+    def put_links(self, links: Iterable[str]) -> None:
+        for link in links:
+            self._queue.put(link)
+            self.sent += 1
+        self.fed = True
+
+    def task_done(self) -> None:
+        with self._completed.get_lock():
+            self._completed.value += 1
+
+    @property
+    def completed(self) -> int:
+        return self._completed.value
+
+    @property
+    def drained(self) -> bool:
+        return self.fed and self.completed >= self.sent
+
+    def finish(self, consumers: int = 1) -> None:
+        # По одному стоп-маркеру на каждого потребителя очереди
+        self.finished = True
+        for _ in range(consumers):
+            self._queue.put(self._STOP)
+
+    def close(self) -> None:
+        self._queue.cancel_join_thread()
+        self._queue.close()
+
+    def __getstate__(self) -> dict:
+        # Счетчики подачи ведет только главный процесс
+        state = self.__dict__.copy()
+        state.update(sent=0, fed=False, finished=False)
+        return state
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            try:
+                link = self._queue.get(timeout=ParserConfig.link_poll_interval)
+            except queue.Empty:
+                # Ожидание ссылки или стоп-маркера - не зависание, супервизор не должен убивать процесс
+                heartbeat.beat()
+                continue
+            if link is self._STOP:
+                return
+            yield link
+
+
+class LinkDispatcher:
+    """Раздача ссылок процессам устройств через ограниченные очереди.
+
+    Ссылки подаются фоновыми потоками по мере освобождения места в
+    очереди, поэтому файл ссылок не загружается в память целиком.
+    В режиме зеркалирования у каждого устройства свой поток и свой
+    проход по источнику, и медленное устройство не тормозит остальные.
+    """
+
+    def __init__(self, serials: List[str], mirror: bool = False, queue_size: int = ParserConfig.link_queue_size) -> None:
+        self.mirror = mirror
+        self.serials = list(serials)
+        self._feeders: List[threading.Thread] = []
+
+        if self.mirror:
+            self._queues: Dict[str, LinkQueue] = {serial: LinkQueue(maxsize=queue_size) for serial in self.serials}
+        else:
+            shared_queue = LinkQueue(maxsize=queue_size)
+            self._queues = {serial: shared_queue for serial in self.serials}
+
+    def get_queue(self, serial: str) -> LinkQueue:
+        return self._queues[serial]
+
+    def dispatch(self, source: LinkSource, skip: Optional[Callable[[Optional[str], str], bool]] = None) -> None:
+        """Запускает подачу ссылок из `source(skip_link)`.
+
+        `skip(serial, link)` отсеивает уже обработанные ссылки: в режиме
+        зеркалирования для каждого устройства отдельно, в режиме общей
+        очереди с `serial=None`.
+        """
+        if self.mirror:
+            for serial, queue in self._queues.items():
+                device_skip = (lambda link, serial=serial: skip(serial, link)) if skip else None
+                self._start_feeder(serial, queue, source(device_skip))
+        else:
+            shared_skip = (lambda link: skip(None, link)) if skip else None
+            self._start_feeder("all", self._queues[self.serials[0]], source(shared_skip))
+
+    def _start_feeder(self, name: str, queue: LinkQueue, links: Iterable[str]) -> None:
+        def feed() -> None:
+            try:
+                queue.put_links(links)
+                summary = getattr(links, "summary", None)
+                if summary:
+                    logger.info(f"Подача ссылок [{name}] завершена: {summary()}")
+            except Exception as e:
+                logger.error(f"Ошибка подачи ссылок [{name}]: {str(e)}")
+                queue.fed = True
+
+        feeder = threading.Thread(target=feed, name=f"LinkFeeder-{name}", daemon=True)
+        feeder.start()
+        self._feeders.append(feeder)
+
+    def consumers(self, queue: LinkQueue) -> List[str]:
+        return [serial for serial, serial_queue in self._queues.items() if serial_queue is queue]
+
+    def finish_drained(self) -> None:
+        """Ставит стоп-маркеры в очереди, все ссылки которых обработаны."""
+        for queue in set(self._queues.values()):
+            if not queue.finished and queue.drained:
+                queue.finish(consumers=len(self.consumers(queue)))
+
+    def close(self) -> None:
+        for queue in set(self._queues.values()):
+            queue.close()
@@ -0,0 +1,142 @@
+import re
+import hashlib
+
+from array import array
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from typing import Callable, Iterator, Optional
+
+_VIDEO_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+_PATH_PREFIXES = ("/shorts/", "/embed/", "/live/", "/v/")
+
+
+def video_id(link: str) -> Optional[str]:
+    parts = urlsplit(link if "://" in link else f"https://{link}")
+    host = parts.netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+
+    candidate = None
+    if host == "youtu.be":
+        candidate = parts.path.lstrip("/").split("/")[0]
+    elif host.endswith("youtube.com") or host.endswith("youtube-nocookie.com"):
+        if parts.path == "/watch":
+            candidate = parse_qs(parts.query).get("v", [None])[0]
+        else:
+            for prefix in _PATH_PREFIXES:
+                if parts.path.startswith(prefix):
+                    candidate = parts.path[len(prefix):].split("/")[0]
+                    break
+
+    if candidate and _VIDEO_ID.fullmatch(candidate):
+        return candidate
+    return None
+
+
+def normalize_link(link: str) -> str:
+    """Приводит ссылку на видео к виду https://www.youtube.com/watch?v=<id>.
+
+    Ссылки, в которых не удалось найти id видео, возвращаются как есть.
+    """
+    link = link.strip()
+    found = video_id(link)
+    return f"https://www.youtube.com/watch?v={found}" if found else link
+
+
+class CompactHashSet:
+    """Множество строк по 64-битным хэшам в массиве с открытой адресацией.
+
+    Хранит около 16 байт на элемент вместо сотен у `set` строк. Вероятность
+    ложного совпадения двух разных ссылок при 64-битном хэше пренебрежимо
+    мала даже для миллионов строк.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        size = 1
+        while size < capacity * 2:
+            size <<= 1
+        self._table = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+        return value or 1
+
+    def _slot(self, value: int) -> int:
+        index = value & self._mask
+        table = self._table
+        while True:
+            current = table[index]
+            if current == 0 or current == value:
+                return index
+            index = (index + 1) & self._mask
+
+    def _grow(self) -> None:
+        old = [value for value in self._table if value]
+        self._table = array("Q", bytes(16 * len(self._table)))
+        self._mask = len(self._table) - 1
+        for value in old:
+            self._table[self._slot(value)] = value
+
+    def add(self, key: str) -> bool:
+        """Добавляет ключ и возвращает True, если его еще не было."""
+        value = self._hash(key)
+        index = self._slot(value)
+        if self._table[index]:
+            return False
+
+        self._table[index] = value
+        self._count += 1
+        if self._count * 2 > len(self._table):
+            self._grow()
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return self._table[self._slot(self._hash(key))] != 0
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class LinkLoader:
+    """Потоковое чтение файла ссылок с нормализацией и удалением дубликатов.
+
+    Файл читается построчно при итерации, в памяти остается только
+    множество хэшей уже выданных видео.
+    """
+
+    def __init__(self, path: str, skip: Optional[Callable[[str], bool]] = None) -> None:
+        self.path = Path(path)
+        self.skip = skip
+        self.total = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.sent = 0
+
+    def __iter__(self) -> Iterator[str]:
+        seen = CompactHashSet()
+        with self.path.open("r", encoding="utf-8") as file:
+            for line in file:
+                link = line.strip()
+                if not link or link.startswith("#"):
+                    continue
+
+                self.total += 1
+                link = normalize_link(link)
+                if not seen.add(link):
+                    self.duplicates += 1
+                    continue
+                if self.skip is not None and self.skip(link):
+                    self.skipped += 1
+                    continue
+
+                self.sent += 1
+                yield link
+
+    def summary(self) -> str:
+        return (
+            f"прочитано {self.total}, дубликатов {self.duplicates}, "
+            f"пропущено по журналу {self.skipped}, отправлено {self.sent}"
+        )
@@ -1,15 +1,27 @@
+from typing import List, Optional
 from uiautomator2 import Device
 
+from src.core.adb_shell import ShellChannel
+
 
 class MobileSettings:
-    def __init__(self, device: Device) -> None:
+    DND_OFF: List[str] = ["cmd", "notification", "set_dnd", "off"]
+    DND_ON: List[str] = ["cmd", "notification", "set_dnd", "on"]
+    ROTATION_PORTRAIT: List[str] = ["settings", "put", "system", "user_rotation", "0"]
+
+    def __init__(self, device: Device, shell: Optional[ShellChannel] = None) -> None:
         self._device = device
+        self._shell = shell or ShellChannel(device)
         
     def notification_enable(self) -> None:
-        self._device.shell(["cmd", "notification", "set_dnd", "off"])
+        self._shell.run(self.DND_OFF)
     
     def notification_disable(self) -> None:
-        self._device.shell(["cmd", "notification", "set_dnd", "on"])
+        self._shell.run(self.DND_ON)
         
     def change_rotation(self) -> None:
-        self._device.shell(["settings", "put", "system", "user_rotation", "0"])
+        self._shell.run(self.ROTATION_PORTRAIT)
+
+    def configure(self) -> None:
+        """Поворот и режим "не беспокоить" одним обменом с устройством."""
+        self._shell.batch([self.ROTATION_PORTRAIT, self.DND_ON])
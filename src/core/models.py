@@ -1,15 +1,22 @@
-from typing import Tuple
+from typing import Optional, Tuple, Union
 from datetime import time
 from PIL.Image import Image
 from uiautomator2 import UiObject
 from dataclasses import dataclass
 
+from src.core.hierarchy import SnapshotNode
+
+
+# (bounds, content-desc, text) для каждого прямого потомка ленты
+FeedFingerprint = Tuple[Tuple[str, str, str], ...]
 
 @dataclass
 class AdParseResult:
     url: str
     text: str
     image: Image
+    image_hash: Optional[str] = None
+    seen_before: bool = False
 
     
 @dataclass
@@ -25,5 +32,5 @@ class NodeCoords:
     center: Tuple[float, float]
 
     @staticmethod
-    def from_node(node: UiObject) -> 'NodeCoords':
+    def from_node(node: Union[UiObject, SnapshotNode]) -> 'NodeCoords':
         return NodeCoords(bounds=node.bounds(), center=node.center())
@@ -1,10 +1,14 @@
+from typing import Union
 from uiautomator2 import Device
 
+from src.core.waiter import Waiter
 from src.core.node_selectors import Selectors
+from src.core.frame_cache import FrameCache
+from src.core.hierarchy import HierarchySnapshot
 
 
 class BaseNode:
-    def __init__(self, device: Device) -> None:
+    def __init__(self, device: Union[Device, HierarchySnapshot]) -> None:
         self.device = device
         self._init_nodes()
         
@@ -56,6 +60,16 @@ class ChromeNodes(BaseNode):
         self.content_preview_text = self.device(**Selectors.Chrome.content_preview_text)
 
 
+class SnapshotNodes:
+    def __init__(self, snapshot: HierarchySnapshot) -> None:
+        self.ad_nodes = AdNodes(snapshot)
+        self.main_nodes = MainNodes(snapshot)
+        self.class_nodes = ClassNodes(snapshot)
+        self.chrome_nodes = ChromeNodes(snapshot)
+        self.player_nodes = PlayerNodes(snapshot)
+        self.content_nodes = ContentNodes(snapshot)
+
+
 class Nodes:
     _instance = None
 
@@ -80,3 +94,8 @@ class Nodes:
         self.player_nodes = PlayerNodes(self.device)
         self.content_nodes = ContentNodes(self.device)
 
+        self.snapshot = HierarchySnapshot(self.device)
+        self.snapshot_nodes = SnapshotNodes(self.snapshot)
+        self.frames = FrameCache(self.device, self.snapshot)
+        self.waiter = Waiter(self.snapshot, self.frames)
+
@@ -7,12 +7,57 @@ class ParserConfig:
     max_swipe_count: int = 9
     max_consecutive_ads: int = 3
     screenshot_similarity_threshold: int = 60
+    screenshot_compare_scale: int = 4
+    screencap_backend: str = "uiautomator"
+    screencap_timeout: float = 10
+    shell_timeout: float = 30
+    shell_reconnect_delay: float = 30
 
     ad_wait_timeout: float = 5
     action_timeout: float = 0.25
     video_load_timeout: float = 1
     player_hide_timeout: float = 5
     node_spawn_timeout: float = 2.5
+    intent_url_timeout: float = 3
+    intent_redirect_timeout: float = 2
+    intent_miss_limit: int = 3
+    logcat_reconnect_delay: float = 5
+    idle_timeout: float = 2
+    wait_poll_interval: float = 0.1
+    ad_close_poll_interval: float = 0.5
+
+    ocr_cache_size: int = 100_000
+    ocr_cache_path: str = "results/ocr_cache.sqlite3"
+    ocr_result_timeout: float = 60
+    ad_index_path: str = "results/ad_index.sqlite3"
+    ad_image_hash_size: int = 16
+    a11y_text_min_segments: int = 2
+    a11y_text_min_letters: int = 15
+    ad_signatures_path: str = "ad_signatures.json"
+    ad_signatures_reload_interval: float = 5
+    ad_review_path: str = "results/ad_review.sqlite3"
+
+    save_queue_size: int = 32
+    image_format: str = "png"
+    image_quality: int = 90
+    png_compress_level: int = 6
+
+    link_queue_size: int = 64
+    progress_path: str = "results/progress"
+    journal_fsync_every: int = 20
+    journal_fsync_interval: float = 5
+
+    heartbeat_timeout: float = 180
+    link_poll_interval: float = 5
+    supervisor_interval: float = 1
+    worker_kill_timeout: float = 5
+    restart_backoff: float = 5
+    restart_max_backoff: float = 300
+    restart_reset_after: float = 600
+    max_link_retries: int = 2
+    device_poll_interval: float = 5
+    device_missing_polls: int = 2
+    adb_timeout: float = 10
 
     telegram_chat_id: int = None
     telegram_bot_api: str = None
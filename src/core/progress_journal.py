@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import logging
+
+from pathlib import Path
+from typing import Dict, IO, Iterator, Optional, Set
+
+from src.core.link_loader import normalize_link
+from src.core.parser_config import ParserConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressJournal:
+    """Журнал обработанных ссылок одного устройства, только дозапись.
+
+    Каждая запись сразу уходит в ОС, поэтому падение процесса ее не
+    теряет, а fsync выполняется пачками: раз в `fsync_every` записей или
+    `fsync_interval` секунд. Оборванная при сбое питания последняя строка
+    при чтении пропускается. Пропущенные из-за ошибки подготовки видео и
+    прерванные ссылки при возобновлении обрабатываются заново.
+    """
+
+    COMPLETED_STATUSES = ("done",)
+
+    def __init__(
+        self,
+        serial: str,
+        path: str = ParserConfig.progress_path,
+        fsync_every: int = ParserConfig.journal_fsync_every,
+        fsync_interval: float = ParserConfig.journal_fsync_interval,
+    ) -> None:
+        self.serial = serial
+        self.path = Path(path).joinpath(f"{serial}.jsonl")
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file: Optional[IO[str]] = None
+        self._closed = False
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _open(self) -> IO[str]:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        return self._file
+
+    def record(
+        self,
+        link: str,
+        status: str,
+        ads: int = 0,
+        duration: float = 0.0,
+        region: Optional[str] = None,
+    ) -> None:
+        if self._closed:
+            logger.warning(f"[{self.serial}] - Журнал закрыт, запись {status} для {link} не сохранена")
+            return
+        file = self._open()
+        entry = {
+            "link": link,
+            "status": status,
+            "ads": ads,
+            "duration": round(duration, 3),
+            "serial": self.serial,
+            "region": region,
+            "time": time.time(),
+        }
+        file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        file.flush()
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        self._closed = True
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def read(path: str = ParserConfig.progress_path) -> Iterator[dict]:
+        for journal_path in sorted(Path(path).glob("*.jsonl")):
+            with journal_path.open("r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Пропущена поврежденная запись журнала {journal_path.name}")
+
+    @classmethod
+    def load_completed(cls, path: str = ParserConfig.progress_path) -> Dict[str, Set[str]]:
+        """Нормализованная ссылка -> устройства, на которых она уже обработана."""
+        completed: Dict[str, Set[str]] = {}
+        for entry in cls.read(path):
+            if entry.get("status") in cls.COMPLETED_STATUSES:
+                completed.setdefault(normalize_link(entry["link"]), set()).add(entry.get("serial"))
+        return completed
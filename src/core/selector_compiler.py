@@ -0,0 +1,58 @@
+from lxml import etree
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+
+Selector = Dict[str, Any]
+SelectorKey = Tuple[Tuple[str, Any], ...]
+
+_CONDITIONS: Dict[str, str] = {
+    "text": "@text={value}",
+    "textContains": "contains(@text, {value})",
+    "textStartsWith": "starts-with(@text, {value})",
+    "className": "@class={value}",
+    "description": "@content-desc={value}",
+    "descriptionContains": "contains(@content-desc, {value})",
+    "descriptionStartsWith": "starts-with(@content-desc, {value})",
+    "resourceId": "@resource-id={value}",
+    "packageName": "@package={value}",
+    "index": "@index={value}",
+}
+
+
+def _literal(value: Any) -> str:
+    value = str(value)
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+def selector_to_predicate(selector: Selector) -> str:
+    conditions = []
+    for key, value in selector.items():
+        template = _CONDITIONS.get(key)
+        if template is None:
+            raise ValueError(f"Селектор '{key}' не поддерживается компилятором XPath")
+        conditions.append(template.format(value=_literal(value)))
+    return " and ".join(conditions) if conditions else "true()"
+
+
+def chain_to_xpath(selectors: Tuple[Selector, ...]) -> str:
+    # Каждое звено цепочки, как и child() в uiautomator, ищет среди всех потомков
+    return "/".join(f"descendant::node[{selector_to_predicate(selector)}]" for selector in selectors)
+
+
+def _selector_key(selector: Selector) -> SelectorKey:
+    return tuple(sorted(selector.items()))
+
+
+@lru_cache(maxsize=None)
+def _compile(chain_key: Tuple[SelectorKey, ...]) -> etree.XPath:
+    return etree.XPath(chain_to_xpath(tuple(dict(key) for key in chain_key)))
+
+
+def compile_chain(selectors: Tuple[Selector, ...]) -> etree.XPath:
+    return _compile(tuple(_selector_key(selector) for selector in selectors))
@@ -0,0 +1,222 @@
+import time
+import logging
+
+from dataclasses import dataclass
+from multiprocessing import Process
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.core.heartbeat import Heartbeat
+from src.core.device_discovery import DeviceDiscovery
+from src.core.parser_config import ParserConfig
+from src.core.link_dispatcher import LinkDispatcher, LinkQueue
+
+
+logger = logging.getLogger(__name__)
+
+WorkerArgs = Callable[[str, LinkQueue, Heartbeat], Tuple]
+
+
+@dataclass
+class WorkerSlot:
+    serial: str
+    heartbeat: Heartbeat
+    process: Optional[Process] = None
+    started_at: float = 0.0
+    next_start: float = 0.0
+    restarts: int = 0
+    finished: bool = False
+    killed: bool = False
+    attached: bool = True
+
+
+@dataclass
+class _Requeue:
+    queue: LinkQueue
+    link: str
+
+
+class Supervisor:
+    """Следит за процессами устройств и перезапускает упавшие и зависшие.
+
+    Процесс считается зависшим, если его heartbeat не обновлялся дольше
+    `heartbeat_timeout`. Такой процесс убивается, его текущая ссылка
+    возвращается в очередь, а перезапуск откладывается с экспоненциальной
+    задержкой. Ссылка, на которой процесс упал больше `max_link_retries`
+    раз, отбрасывается, чтобы не останавливать остальную очередь.
+
+    С `discovery` процессы следуют за подключением устройств: для
+    появившегося устройства процесс запускается, отключенное дорабатывает
+    текущую ссылку и останавливается до повторного подключения. В режиме
+    зеркалирования очередь так и не подключенного устройства закрывается,
+    когда остальные устройства свои очереди обработали.
+    """
+
+    def __init__(
+        self,
+        dispatcher: LinkDispatcher,
+        target: Callable[..., None],
+        args: WorkerArgs,
+        heartbeat_timeout: float = ParserConfig.heartbeat_timeout,
+        restart_backoff: float = ParserConfig.restart_backoff,
+        restart_max_backoff: float = ParserConfig.restart_max_backoff,
+        restart_reset_after: float = ParserConfig.restart_reset_after,
+        max_link_retries: int = ParserConfig.max_link_retries,
+        discovery: Optional[DeviceDiscovery] = None,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.target = target
+        self.args = args
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_backoff = restart_backoff
+        self.restart_max_backoff = restart_max_backoff
+        self.restart_reset_after = restart_reset_after
+        self.max_link_retries = max_link_retries
+        self.discovery = discovery
+
+        self.slots: Dict[str, WorkerSlot] = {}
+        self._requeue: List[_Requeue] = []
+        self._link_failures: Dict[str, int] = {}
+
+    def add(self, serial: str, attached: bool = True) -> WorkerSlot:
+        slot = WorkerSlot(serial=serial, heartbeat=Heartbeat(), attached=attached)
+        self.slots[serial] = slot
+        if attached:
+            self._start(slot)
+        else:
+            logger.info(f"[{serial}] - Устройство не подключено, процесс запустится после подключения")
+        return slot
+
+    def _start(self, slot: WorkerSlot) -> None:
+        slot.heartbeat.reset()
+        slot.killed = False
+        slot.process = Process(
+            name=f"Device-{slot.serial}",
+            target=self.target,
+            args=self.args(slot.serial, self.dispatcher.get_queue(slot.serial), slot.heartbeat),
+            daemon=True
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        logger.debug(f"Процесс для устройства {slot.serial} запущен")
+
+    def run(self, interval: float = ParserConfig.supervisor_interval) -> None:
+        """Следит за процессами, пока все они не завершат свои очереди."""
+        while not all(slot.finished for slot in self.slots.values()):
+            self._flush_requeue()
+            self.dispatcher.finish_drained()
+            if self.discovery:
+                self._sync_devices(self.discovery.present)
+            for slot in self.slots.values():
+                self._check(slot)
+            self._finish_detached()
+            time.sleep(interval)
+
+    def _finish_detached(self) -> None:
+        # Собственную очередь отключенного устройства никто другой не разберет, а
+        # ее подающий поток стоит на заполненной очереди, поэтому ждать ее бессмысленно
+        if not self.dispatcher.mirror:
+            return
+        waiting = [slot for slot in self.slots.values() if not slot.finished and not slot.attached and slot.process is None]
+        active = [slot for slot in self.slots.values() if not slot.finished and slot not in waiting]
+        if not waiting or active or len(waiting) == len(self.slots):
+            return
+        for slot in waiting:
+            logger.warning(f"[{slot.serial}] - Устройство не подключено, его очередь ссылок закрыта необработанной")
+            slot.finished = True
+            self.dispatcher.get_queue(slot.serial).close()
+
+    def _sync_devices(self, present: Set[str]) -> None:
+        for serial, slot in self.slots.items():
+            if slot.finished:
+                continue
+            if serial in present and not slot.attached:
+                slot.attached = True
+                slot.restarts = 0
+                slot.next_start = 0.0
+            elif serial not in present and slot.attached:
+                slot.attached = False
+                if slot.process is not None:
+                    logger.info(f"[{serial}] - Процесс устройства завершит текущую ссылку и остановится")
+                    slot.heartbeat.request_stop()
+
+    def _check(self, slot: WorkerSlot) -> None:
+        if slot.finished:
+            return
+
+        if slot.process is None:
+            if self.dispatcher.get_queue(slot.serial).finished:
+                # Очередь обработана другими устройствами, пока это было отключено
+                slot.finished = True
+            elif slot.attached and time.monotonic() >= slot.next_start:
+                if slot.restarts:
+                    logger.info(f"[{slot.serial}] - Перезапуск процесса устройства (попытка {slot.restarts})")
+                else:
+                    logger.info(f"[{slot.serial}] - Запуск процесса устройства")
+                self._start(slot)
+            return
+
+        if not slot.process.is_alive():
+            slot.process.join()
+            queue = self.dispatcher.get_queue(slot.serial)
+            # Код 0 без стоп-маркера в очереди значит, что worker перехватил ошибку и вышел
+            if slot.process.exitcode == 0 and queue.finished and not slot.killed:
+                slot.finished = True
+                logger.debug(f"Процесс {slot.process.name} завершил работу")
+                return
+            if slot.process.exitcode == 0 and slot.heartbeat.stop_requested and not slot.killed:
+                logger.info(f"[{slot.serial}] - Процесс устройства остановлен")
+                slot.process = None
+                slot.next_start = 0.0
+                return
+            logger.error(f"[{slot.serial}] - Процесс устройства завершился аварийно (код {slot.process.exitcode})")
+            self._recover(slot)
+            return
+
+        age = slot.heartbeat.age()
+        if age > self.heartbeat_timeout:
+            logger.error(f"[{slot.serial}] - Нет heartbeat {age:.0f} с, процесс устройства завершается принудительно")
+            self._kill(slot)
+            self._recover(slot)
+
+    def _kill(self, slot: WorkerSlot) -> None:
+        slot.killed = True
+        slot.process.terminate()
+        slot.process.join(timeout=ParserConfig.worker_kill_timeout)
+        if slot.process.is_alive():
+            # Завис в блокирующем вызове и не обработал SIGTERM
+            slot.process.kill()
+            slot.process.join()
+
+    def _recover(self, slot: WorkerSlot) -> None:
+        queue = self.dispatcher.get_queue(slot.serial)
+        link = slot.heartbeat.link
+        if link:
+            failures = self._link_failures.get(link, 0) + 1
+            self._link_failures[link] = failures
+            if failures > self.max_link_retries:
+                logger.error(f"[{slot.serial}] - Ссылка {link} роняет процесс {failures} раз, пропускаем")
+                queue.task_done()
+            else:
+                logger.info(f"[{slot.serial}] - Ссылка {link} возвращена в очередь")
+                self._requeue.append(_Requeue(queue=queue, link=link))
+        slot.heartbeat.link = None
+
+        if time.monotonic() - slot.started_at >= self.restart_reset_after:
+            slot.restarts = 0
+        delay = min(self.restart_backoff * 2 ** slot.restarts, self.restart_max_backoff)
+        slot.restarts += 1
+        slot.next_start = time.monotonic() + delay
+        slot.process = None
+        logger.info(f"[{slot.serial}] - Перезапуск через {delay:.0f} с")
+
+    def _flush_requeue(self) -> None:
+        # Очередь ограничена, поэтому ссылка кладется без ожидания, чтобы не блокировать надзор
+        self._requeue = [item for item in self._requeue if not item.queue.put(item.link, block=False)]
+
+    def stop(self) -> None:
+        for slot in self.slots.values():
+            if slot.process is not None and slot.process.is_alive():
+                slot.process.terminate()
+        for slot in self.slots.values():
+            if slot.process is not None:
+                slot.process.join(timeout=ParserConfig.worker_kill_timeout)
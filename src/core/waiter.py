@@ -0,0 +1,78 @@
+import time
+import numpy as np
+
+from typing import Any, Callable, Optional, Tuple
+
+from src.core import heartbeat
+from src.core.frame_cache import FrameCache
+from src.core.parser_config import ParserConfig
+from src.core.hierarchy import HierarchySnapshot
+
+
+class Waiter:
+    """Ожидание по условию вместо фиксированных пауз.
+
+    Каждый опрос сбрасывает снимок иерархии, поэтому после успешного
+    ожидания снимок и кадр уже соответствуют текущему экрану. Все методы
+    возвращают False, если условие не выполнилось до истечения `timeout`.
+    """
+
+    def __init__(self, snapshot: HierarchySnapshot, frames: FrameCache) -> None:
+        self.snapshot = snapshot
+        self.frames = frames
+
+    def until(
+        self,
+        condition: Callable[[], bool],
+        timeout: float = ParserConfig.idle_timeout,
+        interval: float = ParserConfig.wait_poll_interval,
+    ) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            heartbeat.beat()
+            self.snapshot.invalidate()
+            if condition():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+
+    def appears(self, node: Any, timeout: float = ParserConfig.idle_timeout) -> bool:
+        return self.until(lambda: node.exists, timeout=timeout)
+
+    def disappears(self, node: Any, timeout: float = ParserConfig.idle_timeout) -> bool:
+        return self.until(lambda: not node.exists, timeout=timeout)
+
+    def _layout_signature(self) -> Tuple[Tuple[str, str, str], ...]:
+        # Текст не учитывается, иначе таймер видео не даст экрану успокоиться
+        return tuple(
+            (element.get("class", ""), element.get("resource-id", ""), element.get("bounds", ""))
+            for element in self.snapshot.root.iter("node")
+        )
+
+    def _stable(self, sample: Callable[[], Any], equal: Callable[[Any, Any], bool], timeout: float) -> bool:
+        previous: Optional[Any] = None
+        deadline = time.monotonic() + timeout
+        while True:
+            heartbeat.beat()
+            self.snapshot.invalidate()
+            current = sample()
+            if previous is not None and equal(previous, current):
+                return True
+            previous = current
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(ParserConfig.wait_poll_interval)
+
+    def idle(self, timeout: float = ParserConfig.idle_timeout) -> bool:
+        """Ждет, пока иерархия не совпадет в двух опросах подряд."""
+        return self._stable(self._layout_signature, lambda a, b: a == b, timeout)
+
+    def region_stable(
+        self,
+        box: Tuple[int, int, int, int],
+        timeout: float = ParserConfig.idle_timeout,
+        scale: int = ParserConfig.screenshot_compare_scale,
+    ) -> bool:
+        """Ждет, пока область экрана не перестанет меняться между кадрами."""
+        return self._stable(lambda: self.frames.view(box)[::scale, ::scale].copy(), np.array_equal, timeout)
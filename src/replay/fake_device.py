@@ -0,0 +1,156 @@
+import time
+import queue
+import logging
+
+from PIL.Image import Image as PILImage
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from uiautomator2 import ShellResponse, UiObjectNotFoundError
+
+from src.core.adb_shell import command_event
+from src.replay.session import ReplaySession
+from src.core.hierarchy import HierarchySnapshot, SnapshotNode, parse_bounds
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayObject(SnapshotNode):
+    """Аналог UiObject для FakeDevice, поддерживающий клики и ожидание."""
+
+    def wait(self, exists: bool = True, timeout: Optional[float] = None) -> bool:
+        # Сам по себе экран записи не меняется, ждать нечего
+        return self.exists == exists
+
+    def get_text(self, timeout: Optional[float] = None) -> str:
+        if not self.exists:
+            raise UiObjectNotFoundError({"code": -32002, "data": str(self.selectors), "method": "getText"})
+        return super().get_text()
+
+    def click(self, timeout: Optional[float] = None, offset: Optional[Tuple[float, float]] = None) -> None:
+        if not self.exists:
+            raise UiObjectNotFoundError({"code": -32002, "data": str(self.selectors), "method": "click"})
+        self.snapshot.device.click(*self.center(offset or (0.5, 0.5)))
+
+    def click_exists(self, timeout: Optional[float] = None) -> bool:
+        if not self.exists:
+            return False
+        self.click()
+        return True
+
+
+class FakeDevice:
+    """Замена `uiautomator2.Device`, воспроизводящая записанную сессию.
+
+    Реализует только то подмножество API, которое использует парсер.
+    Дамп иерархии и кадр берутся из текущего состояния сессии, клики,
+    свайпы, нажатия клавиш и команды shell переводят ее в следующее.
+    Задержки методов берутся из `latency` сессии и умножаются на
+    `latency_scale`, при 0 ожиданий нет совсем.
+    """
+
+    def __init__(
+        self,
+        session: Union[str, ReplaySession],
+        serial: Optional[str] = None,
+        latency_scale: float = 1.0,
+    ) -> None:
+        self.session = session if isinstance(session, ReplaySession) else ReplaySession(path=session)
+        self.serial = serial or self.session.serial
+        self.latency_scale = latency_scale
+        self.state = self.session.initial
+        self.history: List[Tuple[str, str, str]] = []
+        self._live = HierarchySnapshot(self)
+        self._logcat: "queue.Queue[str]" = queue.Queue()
+
+    def _delay(self, method: str, extra: float = 0) -> None:
+        delay = (self.session.latency.get(method, self.session.latency.get("default", 0)) + extra) * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+    def _fire(self, event: str, target: Any = None) -> None:
+        if target is None:
+            target = self.session.transition(self.state, event)
+        if target is None:
+            return
+        if target not in self.session.states:
+            raise KeyError(f"Переход '{event}' ведет в неизвестное состояние '{target}'")
+
+        self.history.append((self.state, event, target))
+        self.state = target
+        self._live.invalidate()
+
+    def __call__(self, **selector: Any) -> ReplayObject:
+        return ReplayObject(snapshot=self._live, selectors=(selector,))
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        width, height = self.session.screen
+        return {"displayWidth": width, "displayHeight": height, "displayRotation": 0, "screenOn": True}
+
+    def window_size(self) -> Tuple[int, int]:
+        return self.session.screen
+
+    def dump_hierarchy(self, compressed: bool = False, pretty: bool = False, max_depth: Optional[int] = None) -> str:
+        self._delay("dump_hierarchy")
+        return self.session.hierarchy(self.state)
+
+    def screenshot(self, filename: Optional[str] = None, format: str = "pillow", display_id: Optional[int] = None) -> PILImage:
+        self._delay("screenshot")
+        image = self.session.screenshot(self.state)
+        if filename:
+            image.save(filename)
+        return image
+
+    def _click_rule(self, rule: Dict[str, Any]) -> None:
+        for line in rule.get("logcat", []):
+            self._logcat.put(line)
+        self._fire("click", rule["to"])
+
+    def click(self, x: float, y: float) -> None:
+        self._delay("click")
+        for rule in self.session.click_rules(self.state):
+            if "bounds" in rule:
+                left, top, right, bottom = rule["bounds"]
+                if left <= x < right and top <= y < bottom:
+                    return self._click_rule(rule)
+                continue
+
+            elements = self._live.find((rule.get("selector", {}),))
+            for element in elements:
+                left, top, right, bottom = parse_bounds(element.get("bounds"))
+                if left <= x < right and top <= y < bottom:
+                    return self._click_rule(rule)
+
+    def logcat_lines(self) -> Iterator[str]:
+        while True:
+            yield self._logcat.get()
+
+    def swipe_points(self, points: List[Tuple[int, int]], duration: float = 0.5) -> None:
+        self._delay("swipe", extra=duration)
+        direction = "swipe_up" if points[-1][1] < points[0][1] else "swipe_down"
+        target = self.session.transition(self.state, direction)
+        self._fire(direction if target is not None else "swipe")
+
+    def swipe(self, fx: float, fy: float, tx: float, ty: float, duration: float = 0.5, steps: Optional[int] = None) -> None:
+        self.swipe_points(points=[(fx, fy), (tx, ty)], duration=duration)
+
+    def press(self, key: Union[int, str], meta: Any = None) -> None:
+        self._delay("press")
+        self._fire(str(key))
+
+    def shell(self, cmdargs: Union[str, List[str]], timeout: float = 60) -> ShellResponse:
+        self._delay("shell")
+        event, link = command_event(cmdargs)
+        if event == "open_link":
+            self._fire("open_link", self.session.links.get(link))
+        elif event is not None:
+            self._fire(event)
+        return ShellResponse(output="", exit_code=0)
+
+    def app_start(self, package_name: str, activity: Optional[str] = None, wait: bool = False, stop: bool = False, use_monkey: bool = False) -> None:
+        self._delay("app_start")
+        self._fire("app_start")
+
+    def app_stop(self, package_name: str) -> None:
+        self._delay("app_stop")
+        self._fire("app_stop")
@@ -0,0 +1,417 @@
+import io
+import json
+import time
+import zlib
+import queue
+import hashlib
+import logging
+import zipfile
+import threading
+import statistics
+
+from lxml import etree
+from pathlib import Path
+from contextlib import contextmanager
+from PIL.Image import Image as PILImage
+from uiautomator2 import Device, ShellResponse
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.replay.session import ReplaySession
+from src.utils.logcat import adb_logcat_lines, parse_view_intent
+from src.core.selector_compiler import compile_chain
+from src.core.adb_shell import command_event
+from src.core.hierarchy import Selector, parse_bounds
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecordedObject:
+    """Обертка над UiObject, записывающая каждый вызов в сессию."""
+
+    def __init__(self, recorder: 'SessionRecorder', obj: Any, chain: Tuple[Selector, ...]) -> None:
+        self._recorder = recorder
+        self._obj = obj
+        self._chain = chain
+
+    def _call(self, method: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        self._recorder.capture_state()
+        return self._recorder.record(method, func, args, kwargs, chain=self._chain)
+
+    @property
+    def exists(self) -> bool:
+        return self._call("exists", lambda: bool(self._obj.exists))
+
+    @property
+    def count(self) -> int:
+        return self._call("count", lambda: self._obj.count)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._call("info", lambda: self._obj.info)
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        return self._call("bounds", self._obj.bounds)
+
+    def center(self, offset: Tuple[float, float] = (0.5, 0.5)) -> Tuple[float, float]:
+        return self._call("center", self._obj.center, offset=offset)
+
+    def get_text(self, timeout: Optional[float] = None) -> str:
+        return self._call("get_text", self._obj.get_text, timeout=timeout)
+
+    def wait(self, exists: bool = True, timeout: Optional[float] = None) -> bool:
+        return self._call("wait", self._obj.wait, exists=exists, timeout=timeout)
+
+    def click(self, timeout: Optional[float] = None, offset: Optional[Tuple[float, float]] = None) -> None:
+        return self._call("click", self._obj.click, timeout=timeout, offset=offset)
+
+    def click_exists(self, timeout: float = 0) -> bool:
+        return self._call("click_exists", self._obj.click_exists, timeout=timeout)
+
+    def child(self, **selector: Any) -> 'RecordedObject':
+        return RecordedObject(self._recorder, self._obj.child(**selector), self._chain + (selector,))
+
+    def __getitem__(self, instance: int) -> 'RecordedObject':
+        return RecordedObject(self._recorder, self._obj[instance], self._chain[:-1] + ({**self._chain[-1], "instance": instance},))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._obj, name)
+
+
+class SessionWriter:
+    """Пишет архив одной сессии в фоновом потоке.
+
+    Иерархии и кадры сохраняются по хэшу содержимого один раз, XML
+    сжимается deflate, PNG кодируется здесь же, чтобы не задерживать
+    поток устройства.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._archive = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._frames: Dict[int, str] = {}
+        self._frame_hashes: Dict[str, str] = {}
+        self._hierarchies: Dict[str, str] = {}
+        self._queue: "queue.Queue[Optional[Tuple[str, Any]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"Recorder-{path.stem}", daemon=True)
+        self._thread.start()
+
+    def put_hierarchy(self, digest: str, xml: str) -> None:
+        self._queue.put(("hierarchy", (digest, xml)))
+
+    def put_frame(self, index: int, image: PILImage) -> None:
+        self._queue.put(("frame", (index, image)))
+
+    def finish(self, events: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+        self._queue.put(("finish", (events, meta)))
+        self._queue.put(None)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout=timeout)
+
+    def _loop(self) -> None:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                kind, payload = item
+                if kind == "hierarchy":
+                    digest, xml = payload
+                    self._hierarchies[digest] = xml
+                    self._archive.writestr(f"hierarchy/{digest}.xml", xml)
+                elif kind == "frame":
+                    self._write_frame(*payload)
+                else:
+                    self._write_session(*payload)
+        except Exception as e:
+            logger.error(f"Ошибка записи сессии {self.path}: {str(e)}")
+        finally:
+            self._archive.close()
+
+    def _write_frame(self, index: int, image: PILImage) -> None:
+        digest = hashlib.sha1(image.tobytes()).hexdigest()[:16]
+        name = f"frames/{digest}.png"
+        if digest not in self._frame_hashes:
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", compress_level=1)
+            self._archive.writestr(name, buffer.getvalue(), compress_type=zipfile.ZIP_STORED)
+            self._frame_hashes[digest] = name
+        self._frames[index] = name
+
+    def _write_session(self, events: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+        for event in events:
+            if "frame" in event:
+                event["frame"] = self._frames.get(event["frame"])
+
+        self._archive.writestr(
+            "events.jsonl",
+            "".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in events)
+        )
+        session = build_session(events, self._hierarchies, meta)
+        self._archive.writestr(ReplaySession.FILE_NAME, json.dumps(session, ensure_ascii=False, indent=4))
+
+
+_ACTION_EVENTS = ("click", "click_exists", "swipe_points", "swipe", "press", "shell", "app_start", "app_stop")
+
+
+def _resolve_chain(xml: str, chain: List[Selector]) -> Optional[Tuple[int, int, int, int]]:
+    root = etree.fromstring(xml.encode("utf-8"))
+    selectors = [dict(selector) for selector in chain]
+    instance = selectors[-1].pop("instance", 0) if selectors else 0
+    elements = compile_chain(tuple(selectors))(root)
+    if not -len(elements) <= instance < len(elements):
+        return None
+    return parse_bounds(elements[instance].get("bounds"))
+
+
+def _point_bounds(xml: str, x: float, y: float) -> List[int]:
+    # Берется самый глубокий узел под точкой, чтобы правило не перехватывало соседние клики
+    root = etree.fromstring(xml.encode("utf-8"))
+    found = [int(x) - 1, int(y) - 1, int(x) + 1, int(y) + 1]
+    for element in root.iter("node"):
+        left, top, right, bottom = parse_bounds(element.get("bounds"))
+        if left <= x < right and top <= y < bottom:
+            found = [left, top, right, bottom]
+    return found
+
+
+def _transition(event: Dict[str, Any], hierarchies: Dict[str, str], state: str) -> Tuple[Optional[str], Any]:
+    method = event["method"]
+    args = event.get("args", [])
+    kwargs = event.get("kwargs", {})
+
+    if method in ("click", "click_exists"):
+        if "chain" in event:
+            bounds = _resolve_chain(hierarchies[state], event["chain"])
+            return ("click", list(bounds)) if bounds else (None, None)
+        x, y = args[:2]
+        return "click", _point_bounds(hierarchies[state], x, y)
+    if method in ("swipe_points", "swipe"):
+        points = args[0] if method == "swipe_points" else [args[:2], args[2:4]]
+        points = points or kwargs.get("points")
+        return ("swipe_up" if points[-1][1] < points[0][1] else "swipe_down"), None
+    if method == "press":
+        return str(args[0] if args else kwargs.get("key")), None
+    if method == "shell":
+        return command_event(args[0] if args else kwargs.get("cmdargs"))[0], None
+    return method, None
+
+
+def build_session(events: List[Dict[str, Any]], hierarchies: Dict[str, str], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Строит session.json для ReplaySession из последовательности событий.
+
+    Состояние - уникальный дамп иерархии. Действие, после которого
+    следующий дамп отличается от предыдущего, становится переходом.
+    Если между дампами было несколько действий, учитывается последнее.
+    Строки logcat прикрепляются к последнему клику до них.
+    """
+    states: Dict[str, Dict[str, Any]] = {}
+    latencies: Dict[str, List[float]] = {}
+    state: Optional[str] = None
+    pending: Optional[Dict[str, Any]] = None
+    first_state: Optional[str] = None
+    last_click: Optional[Dict[str, Any]] = None
+
+    for event in events:
+        method = event["method"]
+        if method == "logcat":
+            # Строка может прийти и до, и после дампа, на котором создается правило клика
+            if pending is not None and pending["method"] in ("click", "click_exists"):
+                pending.setdefault("logcat", []).append(event["line"])
+            elif last_click is not None:
+                last_click.setdefault("logcat", []).append(event["line"])
+            continue
+        latencies.setdefault(method, []).append(event["latency"])
+
+        if method == "dump_hierarchy":
+            digest = event["hierarchy"]
+            states.setdefault(digest, {"hierarchy": f"hierarchy/{digest}.xml", "on": {}})
+            first_state = first_state or digest
+            if pending is not None and state is not None and digest != state:
+                name, bounds = _transition(pending, hierarchies, state)
+                transitions = states[state]["on"]
+                if name == "click" and bounds:
+                    last_click = {"bounds": bounds, "to": digest}
+                    if pending.get("logcat"):
+                        last_click["logcat"] = pending["logcat"]
+                    transitions.setdefault("click", []).append(last_click)
+                elif name is not None and name != "open_link":
+                    transitions[name] = digest
+            state, pending = digest, None
+        elif method == "screenshot":
+            if pending is None and state is not None and event.get("frame"):
+                states[state].setdefault("screenshot", event["frame"])
+        elif method in _ACTION_EVENTS:
+            pending = event
+
+    return {
+        "serial": meta.get("serial", "replay"),
+        "screen": meta.get("screen", [1080, 2400]),
+        "initial": first_state,
+        "latency": {method: round(statistics.median(values), 4) for method, values in latencies.items()},
+        "links": {meta["link"]: first_state} if meta.get("link") and first_state else {},
+        "on": {"open_link": first_state},
+        "states": states,
+    }
+
+
+class SessionRecorder:
+    """Обертка над `uiautomator2.Device`, записывающая сессии отдельных ссылок.
+
+    Записывается только выборка ссылок: каждая ссылка, у которой
+    crc32 делится на `sample_rate`. Вне записи обертка только проверяет
+    флаг и вызывает устройство напрямую. Архив сессии
+    `<root>/<serial>/<время>_<crc32>.zip` содержит `events.jsonl` со всеми
+    вызовами, дедуплицированные дампы и кадры, а также `session.json`,
+    который можно воспроизвести через FakeDevice.
+    """
+
+    def __init__(self, device: Device, root: str = "results/sessions", sample_rate: int = 100) -> None:
+        self.device = device
+        self.root = Path(root)
+        self.sample_rate = max(1, sample_rate)
+        self._writer: Optional[SessionWriter] = None
+        self._events: List[Dict[str, Any]] = []
+        self._hierarchies: set = set()
+        self._started = 0.0
+        self._frame_index = 0
+        self._finished: List[SessionWriter] = []
+        self._stale = False
+
+    @property
+    def active(self) -> bool:
+        return self._writer is not None
+
+    def should_record(self, link: str) -> bool:
+        return zlib.crc32(link.encode("utf-8")) % self.sample_rate == 0
+
+    @contextmanager
+    def recording(self, link: str) -> Iterator[bool]:
+        if not self.should_record(link):
+            yield False
+            return
+
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{zlib.crc32(link.encode('utf-8')):08x}.zip"
+        self._writer = SessionWriter(self.root.joinpath(self.device.serial, name))
+        self._events, self._hierarchies = [], set()
+        self._stale = True
+        self._started = time.perf_counter()
+        logger.info(f"[{self.device.serial}] - Запись сессии: {self._writer.path}")
+        try:
+            yield True
+        finally:
+            writer, self._writer = self._writer, None
+            width, height = self.device.window_size()
+            writer.finish(self._events, {"serial": self.device.serial, "link": link, "screen": [width, height]})
+            self._finished = [w for w in self._finished if w._thread.is_alive()] + [writer]
+
+    def close(self, timeout: float = 30) -> None:
+        for writer in self._finished:
+            writer.join(timeout=timeout)
+        self._finished.clear()
+
+    def capture_state(self) -> None:
+        # Запросы к живым UiObject не снимают дамп, а без него состояние нельзя воспроизвести
+        if self._writer is not None and self._stale:
+            self.record("dump_hierarchy", self.device.dump_hierarchy, source="recorder")
+
+    def record(
+        self,
+        method: str,
+        func: Callable,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        chain: Optional[Tuple[Selector, ...]] = None,
+        source: Optional[str] = None,
+    ) -> Any:
+        kwargs = kwargs or {}
+        if self._writer is None:
+            return func(*args, **kwargs)
+        if method in _ACTION_EVENTS:
+            self._stale = True
+        elif method == "dump_hierarchy":
+            self._stale = False
+
+        event: Dict[str, Any] = {"t": round(time.perf_counter() - self._started, 4), "method": method}
+        if source is not None:
+            event["source"] = source
+        if chain is not None:
+            event["chain"] = list(chain)
+        if args:
+            event["args"] = list(args)
+        if kwargs:
+            event["kwargs"] = kwargs
+
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            event["latency"] = time.perf_counter() - started
+            event["error"] = type(e).__name__
+            self._events.append(event)
+            raise
+        event["latency"] = time.perf_counter() - started
+
+        if isinstance(result, PILImage):
+            self._frame_index += 1
+            self._writer.put_frame(self._frame_index, result)
+            event["frame"] = self._frame_index
+        elif method == "dump_hierarchy":
+            digest = hashlib.sha1(result.encode("utf-8")).hexdigest()[:16]
+            if digest not in self._hierarchies:
+                self._hierarchies.add(digest)
+                self._writer.put_hierarchy(digest, result)
+            event["hierarchy"] = digest
+        elif isinstance(result, ShellResponse):
+            event["result"] = {"output": result.output[:200], "exit_code": result.exit_code}
+        else:
+            event["result"] = result
+
+        self._events.append(event)
+        return result
+
+    def __call__(self, **selector: Any) -> RecordedObject:
+        return RecordedObject(self, self.device(**selector), (selector,))
+
+    def dump_hierarchy(self, *args: Any, **kwargs: Any) -> str:
+        return self.record("dump_hierarchy", self.device.dump_hierarchy, args, kwargs)
+
+    def screenshot(self, *args: Any, **kwargs: Any) -> PILImage:
+        return self.record("screenshot", self.device.screenshot, args, kwargs)
+
+    def click(self, x: float, y: float) -> None:
+        return self.record("click", self.device.click, (x, y))
+
+    def swipe_points(self, points: List[Tuple[int, int]], duration: float = 0.5) -> None:
+        return self.record("swipe_points", self.device.swipe_points, ([tuple(point) for point in points], duration))
+
+    def swipe(self, *args: Any, **kwargs: Any) -> None:
+        return self.record("swipe", self.device.swipe, args, kwargs)
+
+    def press(self, key: Any, meta: Any = None) -> None:
+        return self.record("press", self.device.press, (key,), {"meta": meta} if meta is not None else None)
+
+    def shell(self, *args: Any, **kwargs: Any) -> ShellResponse:
+        return self.record("shell", self.device.shell, args, kwargs)
+
+    def app_start(self, *args: Any, **kwargs: Any) -> None:
+        return self.record("app_start", self.device.app_start, args, kwargs)
+
+    def app_stop(self, *args: Any, **kwargs: Any) -> None:
+        return self.record("app_stop", self.device.app_stop, args, kwargs)
+
+    def logcat_lines(self) -> Iterator[str]:
+        source = getattr(self.device, "logcat_lines", None)
+        for line in (source() if source else adb_logcat_lines(self.device)):
+            # Пишутся только VIEW интенты, остальной лог воспроизведению не нужен
+            if self._writer is not None and parse_view_intent(line) is not None:
+                self._events.append({"t": round(time.perf_counter() - self._started, 4), "method": "logcat", "line": line})
+            yield line
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.device, name)
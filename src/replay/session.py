@@ -0,0 +1,104 @@
+import json
+import zipfile
+import hashlib
+
+from PIL import Image
+from pathlib import Path
+from io import BytesIO
+from PIL.Image import Image as PILImage
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ReplaySession:
+    """Записанная сессия устройства: состояния экрана и переходы между ними.
+
+    Сессия - каталог или zip архив с файлом `session.json`:
+
+        {
+            "serial": "replay",
+            "screen": [1080, 2400],
+            "initial": "home",
+            "latency": {"dump_hierarchy": 0.05, "screenshot": 0.08},
+            "links": {"https://youtu.be/...": "watch"},
+            "on": {"open_link": "watch", "app_start": "home"},
+            "states": {
+                "watch": {
+                    "hierarchy": "hierarchy/watch.xml",
+                    "screenshot": "frames/watch.png",
+                    "on": {
+                        "swipe_up": "watch_2",
+                        "back": "home",
+                        "click": [{"selector": {"descriptionStartsWith": "Sponsored"}, "to": "chrome"}]
+                    }
+                }
+            }
+        }
+
+    События: `swipe_up`, `swipe_down`, `swipe` (любое направление), `click`,
+    `back`, `home`, `open_link`, `app_start`, `app_stop`. Событие без
+    перехода оставляет устройство в текущем состоянии. Переходы из
+    корневого `on` действуют во всех состояниях, если состояние их не
+    переопределяет. Правило клика может содержать `logcat` - строки,
+    которые устройство выдает в logcat при срабатывании правила.
+    """
+
+    FILE_NAME: str = "session.json"
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._archive: Optional[zipfile.ZipFile] = None
+        if self.path.is_file():
+            self._archive = zipfile.ZipFile(self.path)
+
+        self.data: Dict[str, Any] = json.loads(self.read_bytes(self.FILE_NAME))
+        self.states: Dict[str, Dict[str, Any]] = self.data["states"]
+        self.initial: str = self.data.get("initial") or next(iter(self.states))
+        self.serial: str = self.data.get("serial", "replay")
+        self.screen: Tuple[int, int] = tuple(self.data.get("screen", (1080, 2400)))
+        self.latency: Dict[str, float] = self.data.get("latency", {})
+        self.links: Dict[str, str] = self.data.get("links", {})
+
+        self._hierarchies: Dict[str, str] = {}
+        self._frames: Dict[str, PILImage] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_archive"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if self.path.is_file():
+            self._archive = zipfile.ZipFile(self.path)
+
+    def read_bytes(self, name: str) -> bytes:
+        if self._archive is not None:
+            return self._archive.read(name)
+        return self.path.joinpath(name).read_bytes()
+
+    def hierarchy(self, state: str) -> str:
+        if state not in self._hierarchies:
+            self._hierarchies[state] = self.read_bytes(self.states[state]["hierarchy"]).decode("utf-8")
+        return self._hierarchies[state]
+
+    def screenshot(self, state: str) -> PILImage:
+        if state not in self._frames:
+            name = self.states[state].get("screenshot")
+            if name:
+                image = Image.open(BytesIO(self.read_bytes(name)))
+                image.load()
+            else:
+                # Без записанного кадра состояние рисуется однотонным цветом из его имени
+                color = tuple(hashlib.md5(state.encode("utf-8")).digest()[:3])
+                image = Image.new("RGB", self.screen, color)
+            self._frames[state] = image
+        return self._frames[state].copy()
+
+    def transition(self, state: str, event: str) -> Any:
+        transitions = self.states[state].get("on", {})
+        if event in transitions:
+            return transitions[event]
+        return self.data.get("on", {}).get(event)
+
+    def click_rules(self, state: str) -> List[Dict[str, Any]]:
+        return self.transition(state, "click") or []
@@ -1,11 +1,14 @@
 import numpy as np
 
-from typing import Optional
 from PIL import Image, ImageChops
 from PIL.Image import Image as PILImage
+from typing import Dict, Optional, Tuple
 
 
 class ImageUtils:
+    # Буферы быстрого сравнения по размеру кадра, переиспользуются между вызовами
+    _compare_buffers: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
     @staticmethod
     def combine_images_vertically(
         top_img: PILImage, 
@@ -29,6 +32,14 @@ class ImageUtils:
             return None
         return combined
     
+    @staticmethod
+    def dhash(image: PILImage, hash_size: int = 8) -> str:
+        """Перцептивный разностный хэш: знаки разностей соседних пикселей уменьшенной копии."""
+        gray = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+        pixels = np.asarray(gray, dtype=np.int16)
+        bits = pixels[:, 1:] > pixels[:, :-1]
+        return np.packbits(bits).tobytes().hex()
+
     @staticmethod
     def compare_images(image1: PILImage, image2: PILImage, tolerance: int = 5) -> float:
         if image1.size != image2.size or image1.mode != image2.mode:
@@ -52,3 +63,92 @@ class ImageUtils:
         similarity_percent = (similar_pixels / total_pixels) * 100
         
         return round(similarity_percent, 2)
+
+    @staticmethod
+    def compare_images_fast(
+        image1: PILImage,
+        image2: PILImage,
+        tolerance: int = 5,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        scale: int = 4,
+        threshold: Optional[float] = None,
+        grayscale: bool = False,
+        chunk_rows: int = 32,
+    ) -> float:
+        """Быстрый вариант compare_images.
+
+        Сравнивает только область `region` (left, top, right, bottom),
+        прореженную в `scale` раз по каждой оси выборкой пикселей без
+        усреднения. Для кадров телефона результат совпадает с
+        compare_images в пределах ~1 процентного пункта.
+
+        `grayscale=True` сравнивает один канал яркости: это еще в ~2 раза
+        быстрее, но на шумных превью процент может быть завышен на
+        десятки пунктов, поэтому по умолчанию сравниваются все каналы.
+
+        Если передан `threshold`, сравнение останавливается, как только
+        исход `>= threshold` определен. Тогда возвращается граница
+        процента, лежащая по ту же сторону порога, что и точное значение.
+        """
+        if image1.size != image2.size:
+            width = min(image1.width, image2.width)
+            height = min(image1.height, image2.height)
+            image1 = image1.resize((width, height))
+            image2 = image2.resize((width, height))
+
+        mode = "L" if grayscale else "RGB"
+        if image1.mode != mode:
+            image1 = image1.convert(mode)
+        if image2.mode != mode:
+            image2 = image2.convert(mode)
+
+        # Обрезка и прореживание за один проход, без промежуточной копии области
+        box = region or (0, 0, image1.width, image1.height)
+        size = (max((box[2] - box[0]) // scale, 1), max((box[3] - box[1]) // scale, 1))
+        image1 = image1.resize(size, Image.Resampling.NEAREST, box=box)
+        image2 = image2.resize(size, Image.Resampling.NEAREST, box=box)
+
+        array1 = np.asarray(image1)
+        array2 = np.asarray(image2)
+
+        height, width = array1.shape[:2]
+        total_pixels = height * width
+        if total_pixels == 0:
+            return 100.0
+
+        buffers = ImageUtils._compare_buffers.get(array1.shape)
+        if buffers is None:
+            buffers = (np.empty(array1.shape, dtype=np.uint8), np.empty((height, width), dtype=np.uint8))
+            ImageUtils._compare_buffers[array1.shape] = buffers
+        diff, max_diff = buffers
+
+        required_pixels = None if threshold is None else threshold / 100 * total_pixels
+        similar_pixels = 0
+
+        for start in range(0, height, chunk_rows):
+            end = min(start + chunk_rows, height)
+
+            # |a - b| для uint8 без расширения типа: max(a, b) - min(a, b)
+            chunk_diff = diff[start:end]
+            np.maximum(array1[start:end], array2[start:end], out=chunk_diff)
+            chunk_diff -= np.minimum(array1[start:end], array2[start:end])
+
+            if grayscale:
+                chunk_max_diff = chunk_diff
+            else:
+                chunk_max_diff = max_diff[start:end]
+                np.max(chunk_diff, axis=2, out=chunk_max_diff)
+
+            similar_pixels += int(np.count_nonzero(chunk_max_diff <= tolerance))
+
+            if required_pixels is None:
+                continue
+
+            remaining_pixels = (height - end) * width
+            if similar_pixels >= required_pixels:
+                break
+            if similar_pixels + remaining_pixels < required_pixels:
+                similar_pixels += remaining_pixels
+                break
+
+        return round(similar_pixels / total_pixels * 100, 2)
@@ -0,0 +1,256 @@
+import sys
+import json
+import queue
+import socket
+import logging
+import argparse
+import threading
+
+from pathlib import Path
+from dataclasses import dataclass
+from uiautomator2 import Device
+from urllib.parse import parse_qs, unquote, urlsplit
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from src.core.parser_config import ParserConfig
+
+
+logger = logging.getLogger(__name__)
+
+LOGCAT_COMMAND: str = "logcat -v brief -T 1 ActivityTaskManager:I ActivityManager:I *:S"
+
+# Собственные переходы парсера по ссылкам видео тоже приходят как VIEW интенты
+_IGNORED_HOSTS = ("youtube.com", "youtu.be")
+# Трекеры кликов Google передают конечную ссылку в параметре adurl, DoubleClick - в `;adurl=` пути
+_REDIRECT_HOSTS = ("googleadservices.com", "doubleclick.net")
+# На google.com трекеры только по этим путям, play.google.com - уже конечная страница
+_GOOGLE_REDIRECT_PATHS = ("/aclk", "/url", "/pagead/")
+
+
+@dataclass
+class ViewIntent:
+    data: str
+    component: Optional[str] = None
+
+    @property
+    def redacted(self) -> bool:
+        # Начиная с Android 12 путь и параметры в логе заменяются на "..."
+        return self.data.endswith("/...") or self.data.endswith("?...")
+
+    @property
+    def tracker(self) -> bool:
+        return is_redirect(self.data)
+
+    @property
+    def url(self) -> Optional[str]:
+        """Конечная ссылка или None, если она урезана или осталась ссылкой трекера."""
+        if self.redacted:
+            return None
+        url = landing_url(self.data)
+        return None if is_redirect(url) else url
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+def is_redirect(url: str) -> bool:
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if _host_matches(host, _REDIRECT_HOSTS):
+        return True
+    return _host_matches(host, ("google.com",)) and parts.path.startswith(_GOOGLE_REDIRECT_PATHS)
+
+
+def landing_url(url: str) -> str:
+    """Ссылка объявления без редиректа трекера и в https виде для Play Market."""
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    if parts.scheme == "market" and "id" in query:
+        return f"https://play.google.com/store/apps/details?id={query['id'][0]}"
+    if not is_redirect(url):
+        return url
+    if query.get("adurl", [""])[0]:
+        return unquote(query["adurl"][0])
+    # Параметр `;adurl=` идет последним и забирает остаток пути вместе с его `?` и `;`
+    _, found, target = url.partition(";adurl=")
+    if found and target:
+        return unquote(target)
+    return url
+
+
+def parse_view_intent(line: str) -> Optional[ViewIntent]:
+    """Разбирает строку `START u0 {act=android.intent.action.VIEW dat=...}`."""
+    if "START" not in line or "act=android.intent.action.VIEW" not in line:
+        return None
+
+    fields = {}
+    body = line[line.find("{") + 1:line.rfind("}")] if "{" in line else line
+    for token in body.split():
+        key, _, value = token.partition("=")
+        if value and key not in fields:
+            fields[key] = value.rstrip("}")
+
+    data = fields.get("dat")
+    if not data:
+        return None
+    parts = urlsplit(data)
+    if parts.scheme not in ("http", "https", "market"):
+        return None
+    if _host_matches(parts.hostname or "", _IGNORED_HOSTS):
+        return None
+    return ViewIntent(data=data, component=fields.get("cmp"))
+
+
+class LogcatStream:
+    """Строки потокового `adb logcat` устройства.
+
+    Чтение блокируется без таймаута, `close()` из другого потока
+    прерывает его и закрывает соединение.
+    """
+
+    def __init__(self, device: Device, command: str = LOGCAT_COMMAND) -> None:
+        self.connection = device.adb_device.shell(command, stream=True)
+        self.connection.conn.settimeout(None)
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = b""
+        try:
+            while True:
+                # read() ждет полные 4096 байт, из-за чего интенты приходили бы с задержкой
+                chunk = self.connection.conn.recv(4096)
+                if not chunk:
+                    return
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8", errors="replace").rstrip("\r")
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.connection.closed:
+            return
+        try:
+            self.connection.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+
+
+def adb_logcat_lines(device: Device, command: str = LOGCAT_COMMAND) -> Iterator[str]:
+    """Строки потокового `adb logcat` устройства."""
+    yield from LogcatStream(device, command=command)
+
+
+class LogcatReader:
+    """Фоновое чтение logcat с выборкой VIEW интентов.
+
+    Источник строк - `device.logcat_lines()`, если устройство его
+    предоставляет (FakeDevice, SessionRecorder), иначе поток `adb logcat`.
+    Поток запускается при первом `mark()` и переподключается при обрыве.
+    `seen` считает все VIEW интенты, включая переходы самого парсера по
+    ссылкам видео, и показывает, что logcat вообще доставляет строки.
+    """
+
+    def __init__(self, device: Device, reconnect_delay: float = ParserConfig.logcat_reconnect_delay) -> None:
+        self.device = device
+        self.reconnect_delay = reconnect_delay
+        self._intents: "queue.Queue[ViewIntent]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        self._stream: Optional[LogcatStream] = None
+        self.seen = 0
+
+    def _lines(self) -> Iterable[str]:
+        source: Optional[Callable[[], Iterable[str]]] = getattr(self.device, "logcat_lines", None)
+        if source:
+            return source()
+        self._stream = LogcatStream(self.device)
+        return self._stream
+
+    def _loop(self) -> None:
+        while not self._closed.is_set():
+            try:
+                for line in self._lines():
+                    if self._closed.is_set():
+                        return
+                    if "act=android.intent.action.VIEW" in line:
+                        self.seen += 1
+                    intent = parse_view_intent(line)
+                    if intent is not None:
+                        self._intents.put(intent)
+            except Exception as e:
+                if self._closed.is_set():
+                    return
+                logger.warning(f"[{self.device.serial}] - Поток logcat прерван: {str(e)}")
+            self._closed.wait(self.reconnect_delay)
+
+    def mark(self) -> None:
+        """Отбрасывает интенты, пришедшие до текущего действия."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f"Logcat-{self.device.serial}", daemon=True)
+            self._thread.start()
+        while True:
+            try:
+                self._intents.get_nowait()
+            except queue.Empty:
+                return
+
+    def wait_intent(self, timeout: float = ParserConfig.intent_url_timeout) -> Optional[ViewIntent]:
+        try:
+            return self._intents.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wait_landing_url(
+        self,
+        timeout: float = ParserConfig.intent_url_timeout,
+        redirect_timeout: float = ParserConfig.intent_redirect_timeout,
+    ) -> Optional[str]:
+        """Конечная ссылка после клика или None, если ее нет в интентах.
+
+        Если из интента трекера конечная ссылка не извлекается, еще
+        `redirect_timeout` секунд ждется следующий интент с переходом.
+        """
+        intent = self.wait_intent(timeout=timeout)
+        while intent is not None and intent.url is None and intent.tracker:
+            intent = self.wait_intent(timeout=redirect_timeout)
+        return intent.url if intent is not None else None
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._stream is not None:
+            self._stream.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Проверка разбора на записанных логах: `python -m src.utils.logcat fixtures/logcat`."""
+    parser = argparse.ArgumentParser(description="Разбор VIEW интентов из записанного logcat")
+    parser.add_argument("paths", nargs="+", help="Файлы .txt или каталог с expected.json")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in map(Path, args.paths):
+        files = sorted(path.glob("*.txt")) if path.is_dir() else [path]
+        expected_path = (path if path.is_dir() else path.parent).joinpath("expected.json")
+        expected = json.loads(expected_path.read_text(encoding="utf-8")) if expected_path.exists() else {}
+
+        for file in files:
+            intents = [
+                intent for intent in map(parse_view_intent, file.read_text(encoding="utf-8").splitlines())
+                if intent is not None
+            ]
+            urls = [intent.url for intent in intents]
+            status = ""
+            if file.name in expected:
+                ok = urls == expected[file.name]
+                failed += not ok
+                status = "OK " if ok else "FAIL "
+            print(f"{status}{file.name}: {json.dumps(urls, ensure_ascii=False)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,15 @@
 import math
+import bisect
 import pytesseract
 
-from dataclasses import dataclass
+from PIL import Image
 from PIL.ImageEnhance import Contrast
 from PIL.Image import Image as PILImage
+from dataclasses import asdict, dataclass, fields
 from typing import List, Literal, Optional
 
+from src.utils.ocr_cache import OcrCache
+
 
 @dataclass
 class TesseractResult:
@@ -33,34 +37,165 @@ class TesseractCoords:
 
 class Tesseract:
     @staticmethod
-    def get_screen_data(
+    def preprocess(
         image: PILImage,
-        lang: str = "eng",
         contrast_factor: float = 1.5,
         scale: Optional[Literal[2, 4, 8]] = None,
-    ) -> TesseractResult:
+    ) -> PILImage:
         if scale:
             image = image.resize(size=(image.width * scale, image.height * scale))
 
-        if lang != "eng":
-            lang = f"{lang}+eng"
-
         if contrast_factor != 1.0:
             image = Contrast(image).enhance(contrast_factor)
 
+        return image
+
+    @staticmethod
+    def _recognize(image: PILImage, lang: str, scale: Optional[Literal[2, 4, 8]]) -> TesseractResult:
+        if lang != "eng":
+            lang = f"{lang}+eng"
+
         data_dict: dict = pytesseract.image_to_data(
             image=image, lang=lang, output_type=pytesseract.Output.DICT
         )
-        data = TesseractResult(**data_dict)
+        return Tesseract._unscale(TesseractResult(**data_dict), scale=scale)
 
+    @staticmethod
+    def _unscale(data: TesseractResult, scale: Optional[Literal[2, 4, 8]]) -> TesseractResult:
         if scale:
             data.top = [math.floor(i / scale) for i in data.top]
             data.left = [math.floor(i / scale) for i in data.left]
             data.width = [math.ceil(i / scale) for i in data.width]
             data.height = [math.ceil(i / scale) for i in data.height]
+        return data
+
+    @staticmethod
+    def get_screen_data(
+        image: PILImage,
+        lang: str = "eng",
+        contrast_factor: float = 1.5,
+        scale: Optional[Literal[2, 4, 8]] = None,
+        cache: Optional[OcrCache] = None,
+    ) -> TesseractResult:
+        image = Tesseract.preprocess(image=image, contrast_factor=contrast_factor, scale=scale)
+
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(image=image, lang=lang, contrast_factor=contrast_factor, scale=scale)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return TesseractResult(**cached)
+
+        data = Tesseract._recognize(image=image, lang=lang, scale=scale)
 
+        if cache is not None:
+            cache.put(cache_key, asdict(data))
         return data
 
+    @staticmethod
+    def get_cached_screen_data(
+        image: PILImage,
+        cache: OcrCache,
+        lang: str = "eng",
+        contrast_factor: float = 1.5,
+        scale: Optional[Literal[2, 4, 8]] = None,
+    ) -> Optional[TesseractResult]:
+        image = Tesseract.preprocess(image=image, contrast_factor=contrast_factor, scale=scale)
+        cached = cache.get(cache.make_key(image=image, lang=lang, contrast_factor=contrast_factor, scale=scale))
+        return TesseractResult(**cached) if cached is not None else None
+
+    @staticmethod
+    def get_screen_data_batch(
+        images: List[PILImage],
+        lang: str = "eng",
+        contrast_factor: float = 1.5,
+        scale: Optional[Literal[2, 4, 8]] = None,
+        gap: int = 40,
+        cache: Optional[OcrCache] = None,
+    ) -> List[TesseractResult]:
+        """Распознает несколько изображений одним запуском tesseract.
+
+        Изображения проходят `preprocess` по отдельности, как в
+        `get_screen_data`, и склеиваются в столбец с белыми промежутками
+        `gap`, а результат раскладывается обратно по вертикальным координатам.
+        Уже известные кэшу изображения в склейку не попадают.
+        """
+        results: List[Optional[TesseractResult]] = [None] * len(images)
+        cache_keys: List[Optional[str]] = [None] * len(images)
+
+        if cache is not None:
+            for index, image in enumerate(images):
+                prepared = Tesseract.preprocess(image=image, contrast_factor=contrast_factor, scale=scale)
+                cache_keys[index] = cache.make_key(image=prepared, lang=lang, contrast_factor=contrast_factor, scale=scale)
+                cached = cache.get(cache_keys[index])
+                if cached is not None:
+                    results[index] = TesseractResult(**cached)
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if len(missing) == 1:
+            index = missing[0]
+            results[index] = Tesseract.get_screen_data(
+                image=images[index], lang=lang, contrast_factor=contrast_factor, scale=scale
+            )
+        elif missing:
+            for index, result in zip(missing, Tesseract._recognize_stacked(
+                images=[images[index] for index in missing],
+                lang=lang,
+                contrast_factor=contrast_factor,
+                scale=scale,
+                gap=gap
+            )):
+                results[index] = result
+
+        if cache is not None:
+            for index in missing:
+                cache.put(cache_keys[index], asdict(results[index]))
+
+        return results
+
+    @staticmethod
+    def _recognize_stacked(
+        images: List[PILImage],
+        lang: str,
+        contrast_factor: float,
+        scale: Optional[Literal[2, 4, 8]],
+        gap: int,
+    ) -> List[TesseractResult]:
+        # Контраст и масштаб применяются к каждому изображению, иначе результат
+        # не совпадал бы с `get_screen_data` для того же ключа кэша
+        prepared = [
+            Tesseract.preprocess(image=image, contrast_factor=contrast_factor, scale=scale) for image in images
+        ]
+        gap *= scale or 1
+        width = max(image.width for image in prepared)
+        height = sum(image.height for image in prepared) + gap * (len(prepared) - 1)
+        canvas = Image.new("RGB", (width, height), (255, 255, 255))
+
+        offsets = []
+        top = 0
+        for image in prepared:
+            canvas.paste(image, (0, top))
+            offsets.append(top)
+            top += image.height + gap
+
+        # Координаты склейки остаются в масштабе, обратно они пересчитываются уже по изображениям
+        data = Tesseract._recognize(image=canvas, lang=lang, scale=None)
+
+        field_names = [field.name for field in fields(TesseractResult)]
+        results = [TesseractResult(**{name: [] for name in field_names}) for _ in images]
+        for i in range(len(data.text)):
+            center = data.top[i] + data.height[i] // 2
+            index = bisect.bisect_right(offsets, center) - 1
+            if index < 0 or center >= offsets[index] + prepared[index].height:
+                continue
+
+            result = results[index]
+            for name in field_names:
+                getattr(result, name).append(getattr(data, name)[i])
+            result.top[-1] -= offsets[index]
+
+        return [Tesseract._unscale(result, scale=scale) for result in results]
+
     @staticmethod
     def find_matches_by_word(
         lang: str,
@@ -0,0 +1,60 @@
+import json
+import time
+
+from typing import Any, Dict, List, Optional
+from PIL.Image import Image as PILImage
+
+from src.utils.image_utils import ImageUtils
+from src.core.parser_config import ParserConfig
+from src.utils.sqlite_store import SqliteStore
+
+
+class OcrCache(SqliteStore):
+    """Общий для всех процессов кэш результатов OCR в SQLite.
+
+    Ключ - перцептивный хэш подготовленного изображения вместе с его
+    размером, языком, контрастом и масштабом. При переполнении
+    удаляются давно не использованные записи.
+    """
+
+    HASH_SIZE: int = 32
+    EVICTION_INTERVAL: int = 500
+
+    SCHEMA: List[str] = [
+        "CREATE TABLE IF NOT EXISTS ocr_cache (key TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ocr_cache_last_used ON ocr_cache (last_used)",
+    ]
+
+    def __init__(self, path: str = ParserConfig.ocr_cache_path, max_entries: int = ParserConfig.ocr_cache_size) -> None:
+        super().__init__(path=path)
+        self.max_entries = max_entries
+        self._puts = 0
+
+    def make_key(self, image: PILImage, lang: str, contrast_factor: float, scale: Optional[int]) -> str:
+        image_hash = ImageUtils.dhash(image, hash_size=self.HASH_SIZE)
+        return f"{image_hash}:{image.width}x{image.height}:{lang}:{contrast_factor}:{scale}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.connection.execute("SELECT result FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        self.connection.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO ocr_cache (key, result, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(data), time.time())
+        )
+
+        self._puts += 1
+        if self._puts % self.EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        self.connection.execute(
+            "DELETE FROM ocr_cache WHERE key IN "
+            "(SELECT key FROM ocr_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
@@ -0,0 +1,240 @@
+import os
+import queue
+import logging
+import itertools
+import threading
+
+from dataclasses import dataclass
+from concurrent.futures import Future
+from PIL.Image import Image as PILImage
+from multiprocessing import Process, Queue
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.ocr_cache import OcrCache
+from src.utils.ocr import Tesseract, TesseractResult
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OcrRequest:
+    request_id: int
+    client_id: str
+    image: PILImage
+    lang: str
+    contrast_factor: float
+    scale: Optional[int]
+
+
+@dataclass
+class OcrResponse:
+    request_id: int
+    result: Optional[TesseractResult] = None
+    error: Optional[str] = None
+
+
+def _ocr_worker(requests: Queue, responses: Dict[str, Queue], batch_size: int, cache: Optional[OcrCache]) -> None:
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+
+        batch: List[OcrRequest] = [request]
+        while len(batch) < batch_size:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Стоп-маркер возвращается в очередь, чтобы остановить воркер после пакета
+                requests.put(None)
+                break
+            batch.append(request)
+
+        groups: Dict[Tuple[str, float, Optional[int]], List[OcrRequest]] = {}
+        for request in batch:
+            groups.setdefault((request.lang, request.contrast_factor, request.scale), []).append(request)
+
+        for (lang, contrast_factor, scale), group in groups.items():
+            try:
+                results = Tesseract.get_screen_data_batch(
+                    images=[request.image for request in group],
+                    lang=lang,
+                    contrast_factor=contrast_factor,
+                    scale=scale,
+                    cache=cache
+                )
+                for request, result in zip(group, results):
+                    responses[request.client_id].put(OcrResponse(request_id=request.request_id, result=result))
+            except Exception as e:
+                logger.error(f"Ошибка OCR для пакета из {len(group)} изображений: {str(e)}")
+                for request in group:
+                    responses[request.client_id].put(OcrResponse(request_id=request.request_id, error=str(e)))
+
+
+class InlineOcr:
+    """Распознавание прямо в процессе устройства, когда общий сервис не запущен."""
+
+    def __init__(self, cache: Optional[OcrCache] = None) -> None:
+        self.cache = cache
+
+    def submit(
+        self,
+        image: PILImage,
+        lang: str = "eng",
+        contrast_factor: float = 1.5,
+        scale: Optional[int] = None,
+    ) -> Future:
+        future = Future()
+        try:
+            future.set_result(
+                Tesseract.get_screen_data(
+                    image=image, lang=lang, contrast_factor=contrast_factor, scale=scale, cache=self.cache
+                )
+            )
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def discard(self, future: Future) -> None:
+        pass
+
+
+class OcrClient:
+    """Клиент общего OCR сервиса для процесса одного устройства.
+
+    Передается в процесс устройства при его создании, поток чтения
+    ответов запускается лениво при первом запросе.
+    """
+
+    def __init__(self, client_id: str, requests: Queue, responses: Queue, cache: Optional[OcrCache] = None) -> None:
+        self.cache = cache
+        self.client_id = client_id
+        self._requests = requests
+        self._responses = responses
+        self._pending: Optional[Dict[int, Future]] = None
+        self._lock: Optional[threading.Lock] = None
+        self._counter = None
+
+    def _ensure_listener(self) -> None:
+        if self._pending is not None:
+            return
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Номера запросов уникальны между перезапусками процесса, поэтому ответ
+        # на запрос убитого процесса не достанется новому
+        self._counter = itertools.count(os.getpid() << 32)
+        threading.Thread(target=self._listen, name=f"OCR-{self.client_id}", daemon=True).start()
+
+    def _listen(self) -> None:
+        while True:
+            response: OcrResponse = self._responses.get()
+            with self._lock:
+                future = self._pending.pop(response.request_id, None)
+            if future is None or future.done():
+                continue
+            # Ошибка одного ответа не должна останавливать поток, иначе повиснут все следующие запросы
+            try:
+                if response.error is not None:
+                    future.set_exception(RuntimeError(response.error))
+                else:
+                    future.set_result(response.result)
+            except Exception as e:
+                logger.error(f"[{self.client_id}] - Не удалось передать ответ OCR {response.request_id}: {str(e)}")
+
+    def submit(
+        self,
+        image: PILImage,
+        lang: str = "eng",
+        contrast_factor: float = 1.5,
+        scale: Optional[int] = None,
+    ) -> Future:
+        future = Future()
+
+        # Повторяющиеся объявления отдаются из кэша сразу, без очереди сервиса
+        if self.cache is not None:
+            cached = Tesseract.get_cached_screen_data(
+                image=image, cache=self.cache, lang=lang, contrast_factor=contrast_factor, scale=scale
+            )
+            if cached is not None:
+                future.set_result(cached)
+                return future
+
+        self._ensure_listener()
+        with self._lock:
+            request_id = next(self._counter)
+            self._pending[request_id] = future
+
+        self._requests.put(
+            OcrRequest(
+                request_id=request_id,
+                client_id=self.client_id,
+                image=image,
+                lang=lang,
+                contrast_factor=contrast_factor,
+                scale=scale
+            )
+        )
+        return future
+
+    def discard(self, future: Future) -> None:
+        """Забывает запрос, ответ на него будет отброшен."""
+        if self._pending is None:
+            return
+        with self._lock:
+            for request_id, pending in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[request_id]
+
+
+class OcrService:
+    """Общий для всех устройств пул процессов tesseract.
+
+    Процессы устройств кладут запросы в одну очередь, воркеры пула
+    забирают их пакетами до `batch_size` и распознают каждый пакет
+    одним запуском tesseract.
+    """
+
+    def __init__(
+        self,
+        client_ids: List[str],
+        workers: int = 2,
+        batch_size: int = 4,
+        cache: Optional[OcrCache] = None,
+    ) -> None:
+        self.cache = cache
+        self.workers = workers
+        self.batch_size = batch_size
+        self._requests: Queue = Queue()
+        self._responses: Dict[str, Queue] = {client_id: Queue() for client_id in client_ids}
+        self._processes: List[Process] = []
+
+    def client(self, client_id: str) -> OcrClient:
+        return OcrClient(
+            client_id=client_id,
+            requests=self._requests,
+            responses=self._responses[client_id],
+            cache=self.cache
+        )
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            process = Process(
+                name=f"OCR-{index}",
+                target=_ocr_worker,
+                args=(self._requests, self._responses, self.batch_size, self.cache),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info(f"OCR сервис запущен, воркеров: {self.workers}")
+
+    def stop(self, timeout: float = 5) -> None:
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
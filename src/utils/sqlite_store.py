@@ -0,0 +1,39 @@
+import os
+import sqlite3
+
+from pathlib import Path
+from typing import List, Optional
+
+
+class SqliteStore:
+    """База SQLite, общая для нескольких процессов.
+
+    Соединение SQLite нельзя переносить между процессами, поэтому каждый
+    процесс лениво открывает свое, а при передаче в дочерний процесс
+    сериализуется только путь к файлу.
+    """
+
+    SCHEMA: List[str] = []
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_connection_pid"] = None
+        return state
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+            self._connection_pid = os.getpid()
+        return self._connection
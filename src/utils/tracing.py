@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import argparse
+import functools
+import threading
+
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class Tracer:
+    """Запись спанов выполнения в JSONL файл запуска.
+
+    Пока трассировка не включена через `configure()`, декоратор `traced`
+    сводится к одной проверке флага. Процессы устройств пишут в один файл,
+    каждая запись уходит одним системным вызовом в режиме дозаписи.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.serial: Optional[str] = None
+        self._fd: Optional[int] = None
+
+    def configure(self, path: str, serial: Optional[str] = None) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.serial = serial
+        self.enabled = True
+
+    def close(self) -> None:
+        self.enabled = False
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def record(self, span: Dict[str, Any]) -> None:
+        if self._fd is not None:
+            os.write(self._fd, (json.dumps(span, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        if not self.enabled:
+            yield attributes
+            return
+
+        outcome = "ok"
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            outcome = "error"
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            self.record({
+                "name": name,
+                "serial": self.serial,
+                "start": start,
+                "duration": time.perf_counter() - started,
+                "outcome": outcome,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                **attributes,
+            })
+
+
+tracer = Tracer()
+
+
+def traced(name: str) -> Callable:
+    """Оборачивает функцию в спан, bool и None результаты попадают в поле `result`."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name) as attributes:
+                result = func(*args, **kwargs)
+                if result is None or isinstance(result, bool):
+                    attributes["result"] = result
+                return result
+        return wrapper
+    return decorator
+
+
+def to_chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    events = []
+    process_ids: Dict[str, int] = {}
+    for span in spans:
+        serial = span.get("serial") or str(span["pid"])
+        if serial not in process_ids:
+            process_ids[serial] = len(process_ids) + 1
+            events.append({
+                "name": "process_name", "ph": "M", "pid": process_ids[serial], "args": {"name": serial}
+            })
+
+        args = {
+            key: value for key, value in span.items()
+            if key not in ("name", "serial", "start", "duration", "pid", "tid")
+        }
+        events.append({
+            "name": span["name"],
+            "ph": "X",
+            "ts": span["start"] * 1_000_000,
+            "dur": span["duration"] * 1_000_000,
+            "pid": process_ids[serial],
+            "tid": span["tid"],
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Конвертация JSONL трассы в формат Chrome trace")
+    parser.add_argument("path", help="JSONL файл трассы")
+    parser.add_argument("-o", "--output", help="Выходной файл (по умолчанию рядом с исходным, .json)")
+    args = parser.parse_args()
+
+    source = Path(args.path)
+    with source.open("r", encoding="utf-8") as file:
+        spans = [json.loads(line) for line in file if line.strip()]
+
+    output = Path(args.output) if args.output else source.with_suffix(".json")
+    with output.open("w", encoding="utf-8") as file:
+        json.dump(to_chrome_trace(spans), file)
+    print(f"Спанов: {len(spans)}, Chrome trace: {output}")
+
+
+if __name__ == "__main__":
+    main()
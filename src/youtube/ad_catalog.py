@@ -0,0 +1,101 @@
+import os
+import uuid
+import hashlib
+import sqlite3
+
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.utils.sqlite_store import SqliteStore
+
+
+@dataclass
+class AdRecord:
+    url: str
+    text: str
+    region: str
+    serial: str
+    created_at: float
+    image_key: str
+    source_link: Optional[str] = None
+    image_hash: Optional[str] = None
+    ad_id: str = ""
+
+
+class ImageStore:
+    """Хранилище изображений, адресуемое по SHA-256 содержимого.
+
+    Одинаковые изображения хранятся один раз, запись атомарна и
+    безопасна при одновременной работе нескольких процессов.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+
+    def get_path(self, image_key: str) -> Path:
+        digest, extension = image_key.split(".", 1)
+        return self.path.joinpath(digest[:2], f"{digest}.{extension}")
+
+    def put(self, data: bytes, extension: str) -> str:
+        image_key = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        image_path = self.get_path(image_key)
+        if image_path.exists():
+            return image_key
+
+        image_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = image_path.with_name(f"{image_path.name}.{uuid.uuid4().hex}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, image_path)
+        return image_key
+
+
+class AdCatalog(SqliteStore):
+    """Каталог сохраненных объявлений в SQLite, только добавление записей."""
+
+    SCHEMA: List[str] = [
+        "CREATE TABLE IF NOT EXISTS ads ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, ad_id TEXT NOT NULL UNIQUE, url TEXT NOT NULL, text TEXT NOT NULL, "
+        "region TEXT NOT NULL, serial TEXT NOT NULL, created_at REAL NOT NULL, source_link TEXT, "
+        "image_hash TEXT, image_key TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ads_url ON ads (url)",
+        "CREATE INDEX IF NOT EXISTS ads_image_hash ON ads (image_hash)",
+        "CREATE INDEX IF NOT EXISTS ads_image_key ON ads (image_key)",
+        "CREATE INDEX IF NOT EXISTS ads_created_at ON ads (created_at)",
+    ]
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = super().connection
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def add(self, record: AdRecord) -> str:
+        record.ad_id = record.ad_id or uuid.uuid4().hex
+        self.connection.execute(
+            "INSERT INTO ads (ad_id, url, text, region, serial, created_at, source_link, image_hash, image_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.ad_id, record.url, record.text, record.region, record.serial,
+                record.created_at, record.source_link, record.image_hash, record.image_key
+            )
+        )
+        return record.ad_id
+
+    def _select(self, where: str, params: tuple, limit: Optional[int]) -> List[Dict[str, Any]]:
+        query = f"SELECT * FROM ads WHERE {where} ORDER BY created_at"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def find_by_url(self, url: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._select("url = ?", (url,), limit)
+
+    def find_by_image_hash(self, image_hash: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._select("image_hash = ?", (image_hash,), limit)
+
+    def find_between(self, start: float, end: float, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._select("created_at >= ? AND created_at < ?", (start, end), limit)
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM ads").fetchone()[0]
@@ -0,0 +1,221 @@
+import io
+import os
+import json
+import time
+import logging
+import threading
+
+from lxml import etree
+from PIL.Image import Image
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.hierarchy import parse_bounds
+from src.core.parser_config import ParserConfig
+from src.utils.sqlite_store import SqliteStore
+
+
+logger = logging.getLogger(__name__)
+
+ACTIONS: Tuple[str, ...] = ("parse", "skip", "review")
+
+
+@dataclass(frozen=True)
+class AdSignature:
+    """Структурная сигнатура рекламного блока по одному снимку иерархии.
+
+    `view_groups` и `image_views` считаются по всем потомкам, как раньше
+    делали запросы `child()`, поэтому старые пары из `parse_ad` переносятся
+    в таблицу сигнатур без изменений.
+    """
+
+    children: str
+    depth: int
+    view_groups: int
+    image_views: int
+    image_ratio: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.children}/d{self.depth}/vg{self.view_groups}/iv{self.image_views}/r{self.image_ratio}"
+
+    @staticmethod
+    def short_class(element: etree._Element) -> str:
+        return element.get("class", "").rsplit(".", 1)[-1]
+
+    @classmethod
+    def from_element(cls, element: etree._Element) -> 'AdSignature':
+        view_groups = image_views = depth = 0
+        base_depth = len(list(element.iterancestors()))
+        for descendant in element.iterdescendants("node"):
+            match cls.short_class(descendant):
+                case "ViewGroup":
+                    view_groups += 1
+                case "ImageView":
+                    image_views += 1
+            depth = max(depth, len(list(descendant.iterancestors())) - base_depth)
+
+        children = element.findall("node")
+        # Доля высоты блока, занятая превью, округляется, чтобы длина текста не плодила сигнатуры
+        image_ratio = 0.0
+        _, top, _, bottom = parse_bounds(element.get("bounds"))
+        if children and bottom > top:
+            _, child_top, _, child_bottom = parse_bounds(children[0].get("bounds"))
+            image_ratio = round((child_bottom - child_top) / (bottom - top), 1)
+
+        return cls(
+            children=",".join(cls.short_class(child) for child in children),
+            depth=depth,
+            view_groups=view_groups,
+            image_views=image_views,
+            image_ratio=image_ratio
+        )
+
+
+class SignatureTable:
+    """Таблица правил `сигнатура -> действие` из JSON файла.
+
+    Файл перечитывается при изменении, но не чаще раза в
+    `reload_interval` секунд. Правила проверяются по порядку, значение
+    условия может быть числом или строкой, списком допустимых значений
+    или диапазоном `{"min": .., "max": ..}`. Поле `key` сравнивается с
+    полной сигнатурой. Если файл не разобрался, остаются прежние правила.
+    """
+
+    def __init__(
+        self,
+        path: str = ParserConfig.ad_signatures_path,
+        reload_interval: float = ParserConfig.ad_signatures_reload_interval,
+    ) -> None:
+        self.path = path
+        self.reload_interval = reload_interval
+        self.rules: List[Dict[str, Any]] = []
+        self.default = "review"
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _reload(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if self._mtime is None:
+                logger.warning(f"Таблица сигнатур {self.path} не найдена, все блоки уходят на проверку")
+                self._mtime = 0.0
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+            rules = table.get("rules", [])
+            default = table.get("default", "review")
+            for rule in rules + [{"action": default}]:
+                if rule.get("action") not in ACTIONS:
+                    raise ValueError(f"Неизвестное действие: {rule.get('action')}")
+        except Exception as e:
+            logger.error(f"Ошибка чтения таблицы сигнатур {self.path}: {str(e)}")
+            self._mtime = mtime
+            return
+
+        self.rules, self.default, self._mtime = rules, default, mtime
+        logger.info(f"Таблица сигнатур загружена: правил {len(self.rules)}")
+
+    @staticmethod
+    def _matches(value: Any, condition: Any) -> bool:
+        if isinstance(condition, list):
+            return value in condition
+        if isinstance(condition, dict):
+            return condition.get("min", value) <= value <= condition.get("max", value)
+        return value == condition
+
+    def lookup(self, signature: AdSignature) -> Tuple[str, Optional[str]]:
+        """Возвращает действие и имя сработавшего правила."""
+        with self._lock:
+            self._reload()
+            fields = asdict(signature)
+            fields["key"] = signature.key
+            for rule in self.rules:
+                conditions: Dict[str, Any] = rule.get("match", {})
+                if all(self._matches(fields.get(name), condition) for name, condition in conditions.items()):
+                    return rule["action"], rule.get("name")
+            return self.default, None
+
+
+class SignatureReview(SqliteStore):
+    """Счетчики неразобранных сигнатур с образцами для добавления правил.
+
+    Для каждой сигнатуры хранится число показов и первый образец: XML
+    блока, скриншот и ссылка на видео.
+    """
+
+    SCHEMA: List[str] = [
+        "CREATE TABLE IF NOT EXISTS signatures ("
+        "key TEXT PRIMARY KEY, signature TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 1, "
+        "first_seen REAL NOT NULL, last_seen REAL NOT NULL, serial TEXT, source_link TEXT, "
+        "sample_xml TEXT, sample_image BLOB)",
+        "CREATE INDEX IF NOT EXISTS signatures_count ON signatures (count)",
+    ]
+
+    def __init__(self, path: str = ParserConfig.ad_review_path) -> None:
+        super().__init__(path=path)
+
+    def record(
+        self,
+        signature: AdSignature,
+        sample_xml: str,
+        serial: Optional[str] = None,
+        source_link: Optional[str] = None,
+    ) -> int:
+        """Увеличивает счетчик сигнатуры и возвращает его новое значение."""
+        now = time.time()
+        row = self.connection.execute(
+            "INSERT INTO signatures (key, signature, first_seen, last_seen, serial, source_link, sample_xml) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET count = count + 1, last_seen = excluded.last_seen "
+            "RETURNING count",
+            (signature.key, json.dumps(asdict(signature)), now, now, serial, source_link, sample_xml)
+        ).fetchone()
+        return row[0]
+
+    def attach_image(self, key: str, image: Image) -> None:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        self.connection.execute("UPDATE signatures SET sample_image = ? WHERE key = ?", (buffer.getvalue(), key))
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int]]:
+        return self.connection.execute(
+            "SELECT key, count FROM signatures ORDER BY count DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+
+class AdClassifier:
+    def __init__(self, table: Optional[SignatureTable] = None, review: Optional[SignatureReview] = None) -> None:
+        self.table = table or SignatureTable()
+        self.review = review or SignatureReview()
+
+    def classify(self, element: etree._Element) -> Tuple[AdSignature, str]:
+        signature = AdSignature.from_element(element)
+        action, rule = self.table.lookup(signature)
+        logger.debug(f"Сигнатура рекламного блока {signature.key}: {action} ({rule or 'по умолчанию'})")
+        return signature, action
+
+    def collect(
+        self,
+        signature: AdSignature,
+        element: etree._Element,
+        serial: Optional[str] = None,
+        source_link: Optional[str] = None,
+    ) -> bool:
+        """Записывает сигнатуру на проверку, True для первого показа."""
+        sample_xml = etree.tostring(element, encoding="unicode")
+        count = self.review.record(signature, sample_xml=sample_xml, serial=serial, source_link=source_link)
+        if count == 1:
+            logger.warning(f"[{serial}] - Новая сигнатура рекламного блока: {signature.key}")
+        return count == 1
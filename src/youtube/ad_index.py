@@ -0,0 +1,68 @@
+import re
+import time
+
+from typing import List, Optional
+
+from src.core.parser_config import ParserConfig
+from src.utils.sqlite_store import SqliteStore
+
+
+class AdIndex(SqliteStore):
+    """Индекс уже встреченных объявлений и их ссылок.
+
+    Объявление определяется перцептивным хэшем картинки и нормализованным
+    текстом. Для известных объявлений ссылка берется из индекса, а повторный
+    показ записывается отдельной строкой с временем и устройством.
+    """
+
+    SCHEMA: List[str] = [
+        "CREATE TABLE IF NOT EXISTS ads ("
+        "key TEXT PRIMARY KEY, image_hash TEXT NOT NULL, text TEXT NOT NULL, url TEXT NOT NULL, "
+        "first_seen REAL NOT NULL, last_seen REAL NOT NULL, seen_count INTEGER NOT NULL DEFAULT 1)",
+        "CREATE INDEX IF NOT EXISTS ads_image_hash ON ads (image_hash)",
+        "CREATE TABLE IF NOT EXISTS sightings (id INTEGER PRIMARY KEY, key TEXT NOT NULL, serial TEXT, seen_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS sightings_key ON sightings (key)",
+    ]
+
+    def __init__(self, path: str = ParserConfig.ad_index_path) -> None:
+        super().__init__(path=path)
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+    def make_key(self, image_hash: str, text: str) -> str:
+        return f"{image_hash}:{self.normalize_text(text)}"
+
+    def has_image(self, image_hash: str) -> bool:
+        row = self.connection.execute("SELECT 1 FROM ads WHERE image_hash = ? LIMIT 1", (image_hash,)).fetchone()
+        return row is not None
+
+    def find_url(self, image_hash: str, text: str) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT url FROM ads WHERE key = ?", (self.make_key(image_hash=image_hash, text=text),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, image_hash: str, text: str, url: str, serial: Optional[str] = None) -> None:
+        key = self.make_key(image_hash=image_hash, text=text)
+        now = time.time()
+        self.connection.execute(
+            "INSERT INTO ads (key, image_hash, text, url, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET url = excluded.url, last_seen = excluded.last_seen, "
+            "seen_count = seen_count + 1",
+            (key, image_hash, self.normalize_text(text), url, now, now)
+        )
+        self.connection.execute(
+            "INSERT INTO sightings (key, serial, seen_at) VALUES (?, ?, ?)", (key, serial, now)
+        )
+
+    def mark_seen(self, image_hash: str, text: str, serial: Optional[str] = None) -> None:
+        key = self.make_key(image_hash=image_hash, text=text)
+        now = time.time()
+        self.connection.execute(
+            "UPDATE ads SET last_seen = ?, seen_count = seen_count + 1 WHERE key = ?", (now, key)
+        )
+        self.connection.execute(
+            "INSERT INTO sightings (key, serial, seen_at) VALUES (?, ?, ?)", (key, serial, now)
+        )
@@ -1,69 +1,152 @@
-import time
+import logging
 
-from typing import Optional
+from lxml import etree
 from PIL.Image import Image
 from uiautomator2 import Device
+from typing import Optional, Union
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 from src.core.nodes import Nodes
-from src.utils.ocr import Tesseract
+from src.core.hierarchy import parse_bounds
+from src.utils.tracing import traced
+from src.utils.ocr_cache import OcrCache
+from src.utils.ocr import TesseractResult
 from src.core.models import NodeCoords
 from src.core.models import AdParseResult
 from src.utils.image_utils import ImageUtils
-from src.core.node_selectors import Selectors
 from src.core.parser_config import ParserConfig
+from src.utils.logcat import LogcatReader
+from src.youtube.ad_index import AdIndex
+from src.youtube.ad_text import AccessibilityText
+from src.youtube.ad_classifier import AdClassifier, AdSignature
 from src.youtube.content_handler import ContentHandler
+from src.utils.ocr_service import InlineOcr, OcrClient
+
+
+logger = logging.getLogger(__name__)
 
 
 class AdParser:
-    def __init__(self, device: Device, lang: str = "eng") -> None:
+    def __init__(
+        self,
+        device: Device,
+        lang: str = "eng",
+        ocr: Optional[OcrClient] = None,
+        ad_index: Optional[AdIndex] = None,
+        classifier: Optional[AdClassifier] = None,
+    ) -> None:
         self.lang = lang
         self.device = device
+        self.ad_index = ad_index or AdIndex()
+        self.classifier = classifier or AdClassifier()
+        self.intents = LogcatReader(device=self.device)
+        self._intent_misses = 0
+        self._intents_seen = 0
+        self.ocr: Union[OcrClient, InlineOcr] = ocr or InlineOcr(cache=OcrCache())
         self.nodes = Nodes(device=self.device)
         self.content_handler = ContentHandler(device=self.device)
 
+    def return_to_youtube(self) -> None:
+        watch_list_node = self.nodes.snapshot_nodes.content_nodes.watch_list_node
+        # Интент пишется в лог до показа браузера, нажатие назад раньше закрыло бы видео
+        self.nodes.waiter.disappears(watch_list_node, timeout=ParserConfig.node_spawn_timeout)
+        for _ in range(2):
+            self.device.press("back")
+            if self.nodes.waiter.appears(watch_list_node):
+                return
+
+    def wait_intent_url(self) -> Optional[str]:
+        # Переход парсера по ссылке видео тоже пишется в logcat, поэтому любой
+        # новый VIEW интент показывает, что поток жив, и снова включает ожидание
+        seen = self.intents.seen
+        if seen != self._intents_seen:
+            self._intent_misses = 0
+
+        # Если logcat перестал отдавать интенты, не ждем таймаут на каждом объявлении
+        timeout = ParserConfig.intent_url_timeout if self._intent_misses < ParserConfig.intent_miss_limit else 0
+        url = self.intents.wait_landing_url(timeout=timeout)
+        self._intents_seen = self.intents.seen
+        if self._intents_seen == seen:
+            self._intent_misses += 1
+        return url
+
+    @traced("get_ad_url")
     def get_ad_url(self, node_coords: NodeCoords) -> Optional[str]:
+        self.intents.mark()
         self.device.click(*node_coords.center)
-        
+        self.nodes.snapshot.invalidate()
+
+        # Ссылка из интента, если он не урезан, избавляет от меню "Поделиться" в Chrome
+        url = self.wait_intent_url()
+        if url:
+            self.return_to_youtube()
+            return url
+
         try:
             self.nodes.chrome_nodes.action_button.click(timeout=ParserConfig.node_spawn_timeout)
         except:
             return None
+        finally:
+            self.nodes.snapshot.invalidate()
 
         self.nodes.chrome_nodes.content_preview_text.wait(timeout=ParserConfig.node_spawn_timeout)
         
         url = self.nodes.chrome_nodes.content_preview_text.get_text()
 
         self.device.press("back")
-        time.sleep(ParserConfig.action_timeout)
+        self.nodes.waiter.disappears(self.nodes.chrome_nodes.content_preview_text, timeout=ParserConfig.action_timeout)
         self.device.press("back")
-        time.sleep(ParserConfig.action_timeout)
+        self.nodes.waiter.appears(self.nodes.snapshot_nodes.content_nodes.watch_list_node)
 
         return url
         
-    def get_ad_text(self, image: Image) -> str:
+    def submit_ad_text(self, image: Image) -> Future:
         image_crop = image.crop(box=(int(image.width * 0.13), 0, int(image.width * 0.87), image.height))
-        image_data = Tesseract.get_screen_data(image=image_crop, lang=self.lang)
-        text = " ".join(word for line in image_data.text for word in line.split())
-        return text
+        return self.ocr.submit(image=image_crop, lang=self.lang)
 
-    def parse_ad(self) -> Optional[AdParseResult]:
-        view_count = self.nodes.content_nodes.ad_block_node.child(**Selectors.Class.view_group).count
-        image_count = self.nodes.content_nodes.ad_block_node.child(**Selectors.Class.image_view).count
-        
-        match (view_count, image_count):
-            case (8, 4) | (7, 4) | (8, 3) | (7, 3) | (18, 8) | (18, 7) | (18, 9) | (17, 8):
-                ...
-            case (v, i) if (v <= 2 and i <= 3): 
-                return None
-            case (8, 5):
-                return None
-            case _:
-                # Отправка в тг
-                return None
-
-        ad_block_node_children = self.content_handler.get_children_nodes(node=self.nodes.content_nodes.ad_block_node)
-        watch_list_coords = NodeCoords.from_node(node=self.nodes.content_nodes.watch_list_node)
-        ad_block_coords = NodeCoords.from_node(node=self.nodes.content_nodes.ad_block_node)
+    @staticmethod
+    def join_ad_text(image_data: TesseractResult) -> str:
+        return " ".join(word for line in image_data.text for word in line.split())
+
+    @traced("get_ad_text")
+    def wait_ad_text(self, text_future: Future) -> str:
+        try:
+            return self.join_ad_text(text_future.result(timeout=ParserConfig.ocr_result_timeout))
+        except FutureTimeoutError:
+            self.ocr.discard(text_future)
+            raise TimeoutError(f"OCR не ответил за {ParserConfig.ocr_result_timeout} с")
+
+    def get_ad_text(self, image: Image) -> str:
+        return self.wait_ad_text(self.submit_ad_text(image=image))
+
+    def collect_for_review(self, signature: AdSignature, element: etree._Element, source_link: Optional[str] = None) -> None:
+        if not self.classifier.collect(signature, element, serial=self.device.serial, source_link=source_link):
+            return
+
+        # Скриншот нужен только для первого образца сигнатуры
+        left, top, right, bottom = parse_bounds(element.get("bounds"))
+        try:
+            image = self.nodes.frames.crop(box=(max(left, 0), max(top, 0), right, bottom))
+            self.classifier.review.attach_image(signature.key, image)
+        except Exception as e:
+            logger.error(f"[{self.device.serial}] - Не удалось сохранить образец сигнатуры: {str(e)}")
+
+    @traced("parse_ad")
+    def parse_ad(self, source_link: Optional[str] = None) -> Optional[AdParseResult]:
+        content_nodes = self.nodes.snapshot_nodes.content_nodes
+
+        # Действие для блока определяется по таблице сигнатур из одного снимка иерархии
+        element = content_nodes.ad_block_node.element
+        signature, action = self.classifier.classify(element)
+        if action == "review":
+            self.collect_for_review(signature, element, source_link=source_link)
+            return None
+        if action == "skip":
+            return None
+
+        ad_block_node_children = self.content_handler.get_children_nodes(node=content_nodes.ad_block_node)
+        watch_list_coords = NodeCoords.from_node(node=content_nodes.watch_list_node)
+        ad_block_coords = NodeCoords.from_node(node=content_nodes.ad_block_node)
         image_node_coords = NodeCoords.from_node(node=ad_block_node_children[0])
         
         ad_text_block = self.content_handler.get_node_screenshot(
@@ -80,18 +163,39 @@ class AdParser:
                 first_point=image_node_coords.bounds[3],
                 second_point=watch_list_coords.bounds[3]
             )
-            time.sleep(ParserConfig.action_timeout)
+            self.nodes.waiter.idle()
 
-            ad_block_node_children = self.content_handler.get_children_nodes(node=self.nodes.content_nodes.ad_block_node)
+            ad_block_node_children = self.content_handler.get_children_nodes(node=content_nodes.ad_block_node)
             image_node_coords = NodeCoords.from_node(node=ad_block_node_children[0])
+
+        # Текст из атрибутов иерархии точнее OCR, распознавание нужно только без него
+        text = AccessibilityText.extract(content_nodes.ad_block_node.element, text_top=image_node_coords.bounds[3])
+
+        # Превью объявления подгружается асинхронно, кадр снимается после его отрисовки
+        self.nodes.waiter.region_stable(box=image_node_coords.bounds)
         
         ad_image_block = self.content_handler.get_node_screenshot(*image_node_coords.bounds)
+        image_hash = ImageUtils.dhash(ad_image_block, hash_size=ParserConfig.ad_image_hash_size)
+        image = ImageUtils.combine_images_vertically(top_img=ad_image_block, bottom_img=ad_text_block)
+
+        # Текст распознается в OCR сервисе, пока устройство ходит за ссылкой
+        text_future = None if text else self.submit_ad_text(image=ad_text_block)
+
+        # Для уже известного объявления переход в Chrome не нужен
+        if self.ad_index.has_image(image_hash=image_hash):
+            text = text or self.wait_ad_text(text_future)
+            url = self.ad_index.find_url(image_hash=image_hash, text=text)
+            if url is not None:
+                self.ad_index.mark_seen(image_hash=image_hash, text=text, serial=self.device.serial)
+                return AdParseResult(url=url, text=text, image=image, image_hash=image_hash, seen_before=True)
 
-        text = self.get_ad_text(image=ad_text_block)
         url = self.get_ad_url(node_coords=image_node_coords)
         if url is None:
+            if text_future:
+                self.ocr.discard(text_future)
             return None
-        
-        image = ImageUtils.combine_images_vertically(top_img=ad_image_block, bottom_img=ad_text_block)
 
-        return AdParseResult(url=url, text=text, image=image)
+        text = text or self.wait_ad_text(text_future)
+        self.ad_index.add(image_hash=image_hash, text=text, url=url, serial=self.device.serial)
+
+        return AdParseResult(url=url, text=text, image=image, image_hash=image_hash)
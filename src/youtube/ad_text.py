@@ -0,0 +1,64 @@
+import re
+
+from lxml import etree
+from typing import List, Optional
+
+from src.core.hierarchy import parse_bounds
+from src.core.parser_config import ParserConfig
+
+
+class AccessibilityText:
+    """Текст объявления из атрибутов `content-desc` и `text` иерархии.
+
+    Описание самого блока обычно уже содержит рекламодателя, заголовок и
+    кнопку действия через разделитель "·", тексты потомков добавляются к
+    нему без повторов. Метки интерфейса и пометка "Sponsored" отбрасываются.
+    """
+
+    SEPARATORS = re.compile(r"\s*[·•|]\s*")
+    UI_LABELS = ("action menu", "more options", "play video", "pause video", "close", "mute", "unmute")
+    SPONSORED_MARKERS = ("sponsored", "ad", "реклама", "спонсируется")
+
+    @classmethod
+    def _segments(cls, value: str) -> List[str]:
+        return [" ".join(segment.split()) for segment in cls.SEPARATORS.split(value) if segment.strip()]
+
+    @classmethod
+    def _is_label(cls, segment: str) -> bool:
+        lowered = segment.lower()
+        return lowered in cls.UI_LABELS or lowered in cls.SPONSORED_MARKERS or lowered.startswith("go to channel")
+
+    @classmethod
+    def segments(cls, element: etree._Element, text_top: Optional[int] = None) -> List[str]:
+        """Сегменты текста блока, для потомков только ниже `text_top`."""
+        values = [element.get("content-desc", ""), element.get("text", "")]
+        for descendant in element.iterdescendants("node"):
+            # Над областью текста лежит превью с длительностью и значками
+            if text_top is not None and parse_bounds(descendant.get("bounds"))[1] < text_top:
+                continue
+            values.extend((descendant.get("content-desc", ""), descendant.get("text", "")))
+
+        seen = set()
+        segments = []
+        for value in values:
+            for segment in cls._segments(value):
+                key = segment.lower()
+                if key not in seen and not cls._is_label(segment):
+                    seen.add(key)
+                    segments.append(segment)
+        return segments
+
+    @classmethod
+    def extract(
+        cls,
+        element: etree._Element,
+        text_top: Optional[int] = None,
+        min_segments: int = ParserConfig.a11y_text_min_segments,
+        min_letters: int = ParserConfig.a11y_text_min_letters,
+    ) -> Optional[str]:
+        """Текст блока или None, если атрибутов недостаточно и нужен OCR."""
+        segments = cls.segments(element, text_top=text_top)
+        letters = sum(char.isalpha() for segment in segments for char in segment)
+        if len(segments) < min_segments or letters < min_letters:
+            return None
+        return " ".join(segments)
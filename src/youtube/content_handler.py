@@ -1,11 +1,10 @@
-import time
-
 from PIL.Image import Image
-from typing import List, Optional
 from uiautomator2 import Device, UiObject
+from typing import List, Optional, Union
 
 from src.core.nodes import Nodes
-from src.core.models import NodeCoords
+from src.core.models import NodeCoords, FeedFingerprint
+from src.core.hierarchy import SnapshotNode
 from src.core.parser_config import ParserConfig
 
 
@@ -15,9 +14,10 @@ class ContentHandler:
         self.nodes = Nodes(device=self.device)
 
     def get_content_block_coords(self) -> NodeCoords:
-        watch_list_node_coords = NodeCoords.from_node(node=self.nodes.content_nodes.watch_list_node)
-        if self.nodes.content_nodes.relative_container_node.exists:
-            relative_container_node_coords = NodeCoords.from_node(node=self.nodes.content_nodes.relative_container_node)
+        content_nodes = self.nodes.snapshot_nodes.content_nodes
+        watch_list_node_coords = NodeCoords.from_node(node=content_nodes.watch_list_node)
+        if content_nodes.relative_container_node.exists:
+            relative_container_node_coords = NodeCoords.from_node(node=content_nodes.relative_container_node)
             return NodeCoords(
                 bounds=(
                     relative_container_node_coords.bounds[0], relative_container_node_coords.bounds[3],
@@ -30,6 +30,31 @@ class ContentHandler:
             )
         return watch_list_node_coords
 
+    def get_feed_fingerprint(self) -> Optional[FeedFingerprint]:
+        watch_list_node = self.nodes.snapshot_nodes.content_nodes.watch_list_node
+        if not watch_list_node.exists:
+            return None
+
+        fingerprint = []
+        for child in watch_list_node.children():
+            element = child.element
+            description = element.get("content-desc", "")
+            text = element.get("text", "")
+
+            # Карточки ленты часто подписаны не сами, а через вложенные узлы
+            if not description and not text:
+                for descendant in element.iterdescendants("node"):
+                    description = descendant.get("content-desc", "")
+                    text = descendant.get("text", "")
+                    if description or text:
+                        break
+
+            fingerprint.append((element.get("bounds", ""), description, text))
+
+        if not any(description or text for _, description, text in fingerprint):
+            return None
+        return tuple(fingerprint)
+
     def swipe_to_next_content(self) -> None:
         coords = self.get_content_block_coords()
         self.device.swipe_points(
@@ -39,6 +64,7 @@ class ContentHandler:
             ],
             duration=ParserConfig.next_content_swipe_duration
         )
+        self.nodes.snapshot.invalidate()
         
     def swipe_half_content(self) -> None:
         coords = self.get_content_block_coords()
@@ -50,6 +76,7 @@ class ContentHandler:
             ],
             duration=ParserConfig.half_content_swipe_duration
         )
+        self.nodes.snapshot.invalidate()
         
     def reposition_content(self, first_point: int, second_point: int) -> None:
         coords = self.get_content_block_coords()
@@ -60,8 +87,9 @@ class ContentHandler:
             ],
             duration=ParserConfig.reposition_content_swipe_duration
         )
+        self.nodes.snapshot.invalidate()
         
-    def get_children_nodes(self, node: UiObject) -> List[Optional[UiObject]]:
+    def get_children_nodes(self, node: Union[UiObject, SnapshotNode]) -> List[Optional[Union[UiObject, SnapshotNode]]]:
         childrens = []
 
         for child_index in range(node.info["childCount"]):
@@ -69,7 +97,9 @@ class ContentHandler:
             
         return childrens
 
-    def get_children_nodes_with_class(self, node: UiObject, class_name: str) -> List[Optional[UiObject]]:
+    def get_children_nodes_with_class(
+        self, node: Union[UiObject, SnapshotNode], class_name: str
+    ) -> List[Optional[Union[UiObject, SnapshotNode]]]:
         childrens = []
 
         for child_index in range(node.info["childCount"]):
@@ -82,16 +112,18 @@ class ContentHandler:
     def get_node_screenshot(self, left: int, top: int, right: int, bottom: int) -> Image:
         coords = self.get_content_block_coords()
         if coords.bounds[1] >= top:
-            return self.device.screenshot().crop(
+            return self.nodes.frames.crop(
                 box=(left, coords.bounds[1], right, bottom)
             )
-        return self.device.screenshot().crop(
+        return self.nodes.frames.crop(
             box=(left, top, right, bottom)
         )
 
     def back_to_watch_list(self, max_attempts: int = 5) -> None:
         for _ in range(max_attempts):
-            if self.nodes.content_nodes.watch_list_node.exists:
+            if self.nodes.snapshot_nodes.content_nodes.watch_list_node.exists:
                 break
             self.device.press("back")
-            time.sleep(ParserConfig.video_load_timeout)
+            self.nodes.waiter.appears(
+                self.nodes.snapshot_nodes.content_nodes.watch_list_node, timeout=ParserConfig.video_load_timeout
+            )
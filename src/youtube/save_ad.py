@@ -1,22 +1,52 @@
+import io
 import json
 import time
+import queue
+import logging
 import datetime
+import threading
 
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 
+from src.utils.tracing import traced
+from src.core.parser_config import ParserConfig
 from src.core.models import ScheduleItem, AdParseResult
+from src.youtube.ad_catalog import AdCatalog, AdRecord, ImageStore
+
+
+logger = logging.getLogger(__name__)
 
 
 class SaveAdManager:
-    def __init__(self, serial: str, save_path: str = "results", config_path: str = "configs.json") -> None:
+    IMAGE_EXTENSIONS: Dict[str, str] = {"png": "png", "webp": "webp", "jpeg": "jpg"}
+
+    def __init__(
+        self,
+        serial: str,
+        save_path: str = "results",
+        config_path: str = "configs.json",
+        image_format: str = ParserConfig.image_format,
+        queue_size: int = ParserConfig.save_queue_size,
+    ) -> None:
         self.serial = serial
         
         self.config_path = Path(config_path)
-        self.save_path = Path(save_path).joinpath(self.serial)
+        self.save_path = Path(save_path)
+
+        self.catalog = AdCatalog(path=self.save_path.joinpath("catalog.sqlite3"))
+        self.image_store = ImageStore(path=self.save_path.joinpath("images"))
 
         self.schedule = self.load_config()
 
+        self.image_format = image_format.lower()
+        if self.image_format not in self.IMAGE_EXTENSIONS:
+            raise ValueError(f"Неподдерживаемый формат изображений: {image_format}")
+
+        self._queue: "queue.Queue[Optional[Tuple[AdRecord, AdParseResult]]]" = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write_loop, name=f"SaveAd-{self.serial}", daemon=True)
+        self._writer.start()
+
     @staticmethod
     def str2time(time_str: str) -> datetime.time:
         hours, minutes = map(int, time_str.split(":"))
@@ -56,23 +86,63 @@ class SaveAdManager:
 
         return None
 
-    def save_ad_info(self, ad_info: AdParseResult) -> None:
-        self.save_path.mkdir(parents=True, exist_ok=True)
-        
-        if not self.schedule:
-            temp_save_path = self.save_path.joinpath("all")
-        else:
-            region_name = self.get_current_interval()
-            temp_save_path = self.save_path.joinpath(region_name if region_name else "all")
-                
-        temp_save_path.mkdir(parents=True, exist_ok=True)
-        
-        unique_name = str(int(time.time()))
-        ad_save_folder = temp_save_path.joinpath(unique_name)
-        ad_save_folder.mkdir(parents=True, exist_ok=True)
+    @traced("save_ad_info")
+    def save_ad_info(self, ad_info: AdParseResult, source_link: Optional[str] = None) -> None:
+        """Ставит объявление в очередь записи и сразу возвращает управление.
+
+        Регион и время определяются в момент вызова, кодирование
+        изображения и запись в каталог выполняет фоновый поток.
+        При заполненной очереди вызов ждет.
+        """
+        region_name = self.get_current_interval() if self.schedule else None
+        record = AdRecord(
+            url=ad_info.url,
+            text=ad_info.text,
+            region=region_name or "all",
+            serial=self.serial,
+            created_at=time.time(),
+            image_key="",
+            source_link=source_link,
+            image_hash=ad_info.image_hash
+        )
+        self._queue.put((record, ad_info))
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write_ad_info(*item)
+            except Exception as e:
+                logger.error(f"[{self.serial}] - Ошибка при сохранении рекламы: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def encode_image(self, ad_info: AdParseResult) -> bytes:
+        buffer = io.BytesIO()
+        match self.image_format:
+            case "png":
+                ad_info.image.save(buffer, format="PNG", compress_level=ParserConfig.png_compress_level)
+            case "webp":
+                ad_info.image.save(buffer, format="WEBP", quality=ParserConfig.image_quality)
+            case "jpeg":
+                ad_info.image.convert("RGB").save(buffer, format="JPEG", quality=ParserConfig.image_quality)
+        return buffer.getvalue()
+
+    def _write_ad_info(self, record: AdRecord, ad_info: AdParseResult) -> None:
+        record.image_key = self.image_store.put(
+            data=self.encode_image(ad_info),
+            extension=self.IMAGE_EXTENSIONS[self.image_format]
+        )
+        self.catalog.add(record)
 
-        with ad_save_folder.joinpath("info.txt").open("w", encoding="utf-8") as file:
-            file.write(f"Text: {ad_info.text}\n")
-            file.write(f"URL: {ad_info.url}\n")
+    def flush(self) -> None:
+        self._queue.join()
 
-        ad_info.image.save(ad_save_folder.joinpath("image.png"))
+    def close(self) -> None:
+        """Дожидается записи всех объявлений из очереди и останавливает поток."""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join()
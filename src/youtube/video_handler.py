@@ -1,10 +1,9 @@
-import time
-
 from uiautomator2 import Device, UiObjectNotFoundError
 
 from src.core.nodes import Nodes
 from src.core.models import NodeCoords
 from src.core.node_selectors import Selectors
+from src.utils.tracing import traced
 from src.core.parser_config import ParserConfig
 
 
@@ -14,22 +13,24 @@ class VideoHandler:
         self.nodes = Nodes(device=self.device)
     
     def wait_load_video(self, max_attempts: int = 15) -> bool:
-        for _ in range(max_attempts):
-            if (self.nodes.class_nodes.relative_layouts.count == 0) and (not self.nodes.player_nodes.progress_bar.exists):
-                return True
-            time.sleep(ParserConfig.video_load_timeout)
-        return False
+        return self.nodes.waiter.until(
+            lambda: (self.nodes.class_nodes.relative_layouts.count == 0) and (not self.nodes.player_nodes.progress_bar.exists),
+            timeout=max_attempts * ParserConfig.video_load_timeout,
+            interval=ParserConfig.action_timeout
+        )
     
     def stop_video(self) -> bool:
         try:
             control_btn = self.nodes.player_nodes.control_button
             if not control_btn.exists:
                 self.nodes.main_nodes.video_player_node.click()
+                self.nodes.snapshot.invalidate()
                 control_btn.wait(timeout=ParserConfig.action_timeout)
 
             if control_btn.exists:
                 if control_btn.info.get("contentDescription") != "Play video":
                     control_btn.click()
+                    self.nodes.snapshot.invalidate()
                     control_btn.wait(timeout=ParserConfig.action_timeout)
                 return control_btn.info.get("contentDescription") == "Play video"
             return False
@@ -40,7 +41,7 @@ class VideoHandler:
         for _ in range(max_attempts):
             if self.stop_video():
                 return True
-            time.sleep(ParserConfig.action_timeout)
+            self.nodes.waiter.idle(timeout=ParserConfig.action_timeout)
         return False
         
     def _handle_drag_handle_case(self) -> bool:
@@ -51,22 +52,22 @@ class VideoHandler:
         end_point = (drag_button_coords.center[0], main_node_coords.bounds[3] - ParserConfig.offset)
         
         self.device.swipe_points(points=[start_point, end_point], duration=ParserConfig.hidden_ad_duration)
-        time.sleep(ParserConfig.action_timeout)
+        self.nodes.snapshot.invalidate()
 
-        return not self.nodes.ad_nodes.drag_handle_button.exists
+        return self.nodes.waiter.disappears(self.nodes.ad_nodes.drag_handle_button)
     
     def _handle_close_button_case(self) -> bool:
         try:
             button = self.nodes.ad_nodes.header_panel_node.child(**Selectors.Ad.close_ad_button)
             if button.exists and button.click_exists(timeout=1):
-                time.sleep(ParserConfig.action_timeout)
-                return not button.exists
+                self.nodes.snapshot.invalidate()
+                return self.nodes.waiter.disappears(button)
 
             buttons = self.nodes.ad_nodes.header_panel_node.child(**Selectors.Class.image_view)
             if buttons.count > 0 and buttons[-1].click_exists(timeout=1):
-                time.sleep(ParserConfig.action_timeout)
+                self.nodes.snapshot.invalidate()
                 try:
-                    return not buttons[-1].exists
+                    return self.nodes.waiter.disappears(buttons[-1])
                 except AssertionError:
                     return True
         except UiObjectNotFoundError:
@@ -83,20 +84,34 @@ class VideoHandler:
         
         return self._handle_close_button_case()
     
+    @traced("hide_ads")
     def hide_ads(self) -> bool:
-        success = self._handle_close_ad()
-        if not success:
-            time.sleep(ParserConfig.ad_wait_timeout)
-            success = self._handle_close_ad()
+        header_panel_node = self.nodes.ad_nodes.header_panel_node
+        # Панель рекламы подгружается позже видео, сначала ждем ее появления
+        appeared = self.nodes.waiter.until(
+            lambda: header_panel_node.exists,
+            timeout=ParserConfig.ad_wait_timeout,
+            interval=ParserConfig.ad_close_poll_interval
+        )
+        if not appeared:
+            return True
+
+        # Кнопка закрытия может появиться не сразу, поэтому попытки повторяются до дедлайна
+        success = self.nodes.waiter.until(
+            lambda: (not header_panel_node.exists) or self._handle_close_ad(),
+            timeout=ParserConfig.ad_wait_timeout,
+            interval=ParserConfig.ad_close_poll_interval
+        )
 
-        if not success and self.nodes.ad_nodes.header_panel_node.exists:
+        if not success and header_panel_node.exists:
             return False
         return True
 
+    @traced("preparing_video")
     def preparing_video(self) -> bool:
         if not self.wait_load_video():
             return False
-        time.sleep(ParserConfig.action_timeout)
+        self.nodes.waiter.idle()
         
         watch_list_node = self.nodes.content_nodes.watch_list_node
         if watch_list_node.exists and watch_list_node.child().count == 0:
@@ -104,10 +119,9 @@ class VideoHandler:
 
         if not self.ensure_video_stopped():
             return False
-        time.sleep(ParserConfig.action_timeout)
         
         if not self.hide_ads():
             return False
-        time.sleep(ParserConfig.action_timeout)
+        self.nodes.waiter.idle()
         
         return True
@@ -1,17 +1,22 @@
+from typing import Optional
 from uiautomator2 import Device
 
+from src.core.adb_shell import ShellChannel
+
 
 class YoutubeApp:
     PACKAGE_NAME: str = "com.google.android.youtube"
     
-    def __init__(self, device: Device) -> None:
+    def __init__(self, device: Device, shell: Optional[ShellChannel] = None) -> None:
         self.device = device
+        self.shell = shell or ShellChannel(device)
 
     def start(self) -> None:
-        self.device.app_start(package_name=self.PACKAGE_NAME)
+        # То же, что `device.app_start` без activity
+        self.shell.run(["monkey", "-p", self.PACKAGE_NAME, "-c", "android.intent.category.LAUNCHER", "1"])
 
     def close(self) -> None:
-        self.device.app_stop(package_name=self.PACKAGE_NAME)
+        self.shell.run(["am", "force-stop", self.PACKAGE_NAME])
 
     def open_link(self, link: str) -> None:
-        self.device.shell(f'am start -a android.intent.action.VIEW -d "{link}"')
+        self.shell.run(["am", "start", "-a", "android.intent.action.VIEW", "-d", link])
@@ -3,11 +3,15 @@ import time
 import signal
 import logging
 
-from typing import List
+from PIL.Image import Image
+from contextlib import nullcontext
+from typing import Iterable, Optional
 from uiautomator2 import Device
 
 from src.core.nodes import Nodes
-from src.core.models import NodeCoords
+from src.core.adb_shell import ShellChannel
+from src.core.screencap import make_frame_source
+from src.core.models import NodeCoords, FeedFingerprint
 from src.youtube.ad_parser import AdParser
 from src.utils.image_utils import ImageUtils
 from src.youtube.save_ad import SaveAdManager
@@ -15,6 +19,10 @@ from src.youtube.youtube_app import YoutubeApp
 from src.core.parser_config import ParserConfig
 from src.youtube.video_handler import VideoHandler
 from src.core.mobile_settings import MobileSettings
+from src.utils.tracing import tracer, traced
+from src.replay.recorder import SessionRecorder
+from src.core.progress_journal import ProgressJournal
+from src.utils.ocr_service import OcrClient
 from src.youtube.content_handler import ContentHandler
 
 
@@ -30,11 +38,23 @@ class ContentEndError(Exception):
     pass
 
 class YoutubeParser:
-    def __init__(self, device: Device, lang: str = "eng") -> None:
+    def __init__(
+        self,
+        device: Device,
+        lang: str = "eng",
+        ocr: Optional[OcrClient] = None,
+        journal: Optional[ProgressJournal] = None,
+        screencap: str = ParserConfig.screencap_backend,
+    ) -> None:
         """Инициализация парсера YouTube."""
         self.lang = lang
+        self.ocr = ocr
         self.device = device
+        self.journal = journal
+        self.screencap = screencap
         self._running = False
+        self._current_link: Optional[str] = None
+        self._link_ads = 0
         
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -53,10 +73,12 @@ class YoutubeParser:
     def _initialize_components(self) -> None:
         """Инициализирует все необходимые компоненты."""
         self.nodes = Nodes(device=self.device)
-        self.app = YoutubeApp(device=self.device)
-        self.mobile = MobileSettings(device=self.device)
+        self.nodes.frames.set_source(make_frame_source(self.device, self.screencap))
+        self.shell = ShellChannel(device=self.device)
+        self.app = YoutubeApp(device=self.device, shell=self.shell)
+        self.mobile = MobileSettings(device=self.device, shell=self.shell)
         
-        self.ad_parser = AdParser(device=self.device)
+        self.ad_parser = AdParser(device=self.device, lang=self.lang, ocr=self.ocr)
         self.video_handler = VideoHandler(device=self.device)
         self.content_handler = ContentHandler(device=self.device)
         self.save_manager = SaveAdManager(serial=self.device.serial)
@@ -64,8 +86,7 @@ class YoutubeParser:
     def _configure_device(self) -> None:
         """Выполняет базовую настройку устройства."""
         try:
-            self.mobile.change_rotation()
-            self.mobile.notification_disable()
+            self.mobile.configure()
             logger.info(f"[{self.device.serial}] - Устройство успешно настроено")
         except Exception as e:
             logger.error(f"[{self.device.serial}] - Ошибка при настройке устройства: {str(e)}")
@@ -73,6 +94,20 @@ class YoutubeParser:
         
     def _cleanup(self) -> None:
         """Выполняет очистку ресурсов при завершении работы."""
+        try:
+            self.save_manager.close()
+            logger.info(f"[{self.device.serial}] - Очередь сохранения рекламы записана")
+        except Exception as e:
+            logger.error(f"[{self.device.serial}] - Ошибка при записи очереди сохранения: {str(e)}")
+
+        self.ad_parser.intents.close()
+
+        if isinstance(self.device, SessionRecorder):
+            self.device.close()
+
+        if self.journal:
+            self.journal.close()
+
         try:
             logger.info(f"[{self.device.serial}] - Завершение работы, закрытие YouTube...")
             self.app.close()
@@ -80,13 +115,16 @@ class YoutubeParser:
         except Exception as e:
             logger.error(f"[{self.device.serial}] - Ошибка при закрытии YouTube: {str(e)}")
 
-    def run(self, links: List[str]) -> None:
-        """Основной метод для запуска парсера."""
-        if not links:
-            logger.warning(f"[{self.device.serial}] - Список ссылок пуст")
-            return
+        self.shell.close()
+
+    def run(self, links: Iterable[str]) -> None:
+        """Основной метод для запуска парсера.
 
+        Ссылки берутся по одной по мере освобождения устройства,
+        поэтому `links` может быть как списком, так и общей очередью.
+        """
         self._running = True
+        processed_count = 0
         
         try:
             self._start_youtube_app()
@@ -95,11 +133,16 @@ class YoutubeParser:
                 if not self._running:
                     break
                 self._process_link(link)
+                processed_count += 1
                 
         except Exception as e:
             logger.error(f"[{self.device.serial}] - Критическая ошибка: {str(e)}", exc_info=True)
             raise
         finally:
+            if processed_count == 0:
+                logger.warning(f"[{self.device.serial}] - Список ссылок пуст")
+            else:
+                logger.info(f"[{self.device.serial}] - Обработано ссылок: {processed_count}")
             self._cleanup()
 
     def _start_youtube_app(self) -> None:
@@ -114,20 +157,40 @@ class YoutubeParser:
     def _process_link(self, link: str) -> None:
         """Обрабатывает одну ссылку."""
         cleaned_link = link.strip()
+        self._current_link = cleaned_link
+        self._link_ads = 0
+        # Ссылка считается обработанной только после полного прохода, выход по сигналу оставляет ее в очереди
+        status = "interrupted"
+        started = time.perf_counter()
         logger.info(f"[{self.device.serial}] - Начало обработки ссылки: {cleaned_link}")
         
-        try:
-            self.app.open_link(link=cleaned_link)
-            if not self._prepare_video():
-                logger.warning(f"[{self.device.serial}] - Пропускаем ссылку из-за ошибки подготовки видео")
-                return
-            self._process_content()
-        except Exception as e:
-            logger.error(f"[{self.device.serial}] - Ошибка при обработке ссылки {cleaned_link}: {str(e)}")
-            # Продолжаем работу со следующей ссылкой
-        finally:
-            # Закрываем текущее видео перед переходом к следующему
-            ...
+        recording = self.device.recording(cleaned_link) if isinstance(self.device, SessionRecorder) else nullcontext()
+        with recording, tracer.span("process_link", link=cleaned_link) as span:
+            try:
+                self.app.open_link(link=cleaned_link)
+                if not self._prepare_video():
+                    status = span["outcome"] = "skipped"
+                    logger.warning(f"[{self.device.serial}] - Пропускаем ссылку из-за ошибки подготовки видео")
+                    return
+                self._process_content()
+                status = "done"
+            except Exception as e:
+                status = "failed"
+                span["outcome"] = "error"
+                span["error"] = type(e).__name__
+                logger.error(f"[{self.device.serial}] - Ошибка при обработке ссылки {cleaned_link}: {str(e)}")
+                # Продолжаем работу со следующей ссылкой
+            finally:
+                # Закрываем текущее видео перед переходом к следующему
+                ...
+                if self.journal:
+                    self.journal.record(
+                        link=cleaned_link,
+                        status=status,
+                        ads=self._link_ads,
+                        duration=time.perf_counter() - started,
+                        region=self.save_manager.get_current_interval() if self.save_manager.schedule else None
+                    )
     
     def _prepare_video(self) -> bool:
         """Подготавливает видео к просмотру."""
@@ -147,6 +210,7 @@ class YoutubeParser:
     def _process_content(self) -> None:
         """Обрабатывает контент на странице."""
         swipe_count = 0
+        self.nodes.snapshot.invalidate()
         while self._running and swipe_count < ParserConfig.max_swipe_count:
             try:
                 if self._process_ad_block():
@@ -162,11 +226,12 @@ class YoutubeParser:
                 break
                 
     def _process_ad_block(self) -> bool:
-        if not self.nodes.content_nodes.ad_block_node.exists:
+        content_nodes = self.nodes.snapshot_nodes.content_nodes
+        if not content_nodes.ad_block_node.exists:
             return False
 
-        ad_block_coords = NodeCoords.from_node(self.nodes.content_nodes.ad_block_node)
-        watch_block_coords = NodeCoords.from_node(self.nodes.content_nodes.watch_list_node)
+        ad_block_coords = NodeCoords.from_node(content_nodes.ad_block_node)
+        watch_block_coords = NodeCoords.from_node(content_nodes.watch_list_node)
 
         if ad_block_coords.bounds[3] == watch_block_coords.bounds[3]:
             self.content_handler.swipe_half_content()
@@ -180,33 +245,64 @@ class YoutubeParser:
             first_point=ad_coords.bounds[3],
             second_point=watch_coords.bounds[3]
         )
-        time.sleep(ParserConfig.action_timeout)
+        self.nodes.waiter.idle()
         
         self._parse_and_save_ad()
         
         self._swipe_to_next_content(swipes=3)
         
     def _parse_and_save_ad(self) -> None:
-        result = self.ad_parser.parse_ad()
+        result = self.ad_parser.parse_ad(source_link=self._current_link)
         if result:
-            self.save_manager.save_ad_info(result)
+            self._link_ads += 1
+
+        if result and result.seen_before:
+            logger.info(f"[{self.device.serial}] - Повторная реклама: {result.text:.50}...")
+
+        elif result:
+            self.save_manager.save_ad_info(result, source_link=self._current_link)
             logger.info(f"[{self.device.serial}] - Найдена реклама: {result.text:.50}...")
         
         else:
             self.content_handler.back_to_watch_list()
 
+    @traced("swipe_to_next_content")
     def _swipe_to_next_content(self, swipes: int = 1) -> None:
         for _ in range(swipes):
-            before_swipe = self.device.screenshot()
+            before_fingerprint = self.content_handler.get_feed_fingerprint()
+            # Кадр нужен только если по иерархии не удастся понять, был ли скролл
+            before_swipe = None if before_fingerprint else self.nodes.frames.screenshot()
+
             self.content_handler.swipe_to_next_content()
-            time.sleep(ParserConfig.action_timeout)
+            self.nodes.waiter.idle()
 
-            after_swipe = self.device.screenshot()
-            if self._is_same_content(before_swipe, after_swipe):
+            after_fingerprint = self.content_handler.get_feed_fingerprint()
+            if self._is_same_content(before_fingerprint, after_fingerprint, before_swipe):
                 raise ContentEndError("Контент не изменился после свайпа")
 
-    def _is_same_content(self, img1, img2) -> bool:
-        match = ImageUtils.compare_images(img1, img2)
+    def _is_same_content(
+        self,
+        before_fingerprint: Optional[FeedFingerprint],
+        after_fingerprint: Optional[FeedFingerprint],
+        before_swipe: Optional[Image],
+    ) -> bool:
+        if before_fingerprint and after_fingerprint:
+            return before_fingerprint == after_fingerprint
+
+        if before_swipe is None:
+            # До свайпа лента была распознана, а после нет — экран точно изменился
+            return False
+
+        region = None
+        if self.nodes.snapshot_nodes.content_nodes.watch_list_node.exists:
+            region = self.content_handler.get_content_block_coords().bounds
+
+        match = ImageUtils.compare_images_fast(
+            before_swipe, self.nodes.frames.screenshot(),
+            region=region,
+            scale=ParserConfig.screenshot_compare_scale,
+            threshold=ParserConfig.screenshot_similarity_threshold
+        )
         logger.info(f"[{self.device.serial}] - Схожесть скриншотов: {match}%")
         return match >= ParserConfig.screenshot_similarity_threshold
 
@@ -6,6 +6,7 @@ import subprocess
 
 from pathlib import Path
 from argparse import Namespace
+from typing import List, Tuple
 
 
 logging.basicConfig(
@@ -144,7 +145,7 @@ def build():
     logger.info(f"  Windows:  {VENV_NAME}\\Scripts\\activate")
     logger.info(f"  Linux/Mac:  source {VENV_NAME}/bin/activate")
 
-def parse_args() -> Namespace:
+def parse_args() -> Tuple[Namespace, List[str]]:
     """Парсинг аргументов командной строки."""
     parser = argparse.ArgumentParser(description="Парсер рекламы YouTube")
     parser.add_argument(
@@ -153,14 +154,20 @@ def parse_args() -> Namespace:
         help="Список серийных номеров устройств",
         required=True
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "-m", "--mirror",
+        action="store_true",
+        help="Каждое устройство обрабатывает все ссылки (вместо общей очереди)"
+    )
+    # Остальные аргументы передаются в main.py без изменений
+    return parser.parse_known_args()
 
 def activate_and_run():
     # Определяем пути
     venv_path = Path(".venv")
     main_script = Path("main.py")
 
-    args = parse_args()
+    args, extra_args = parse_args()
 
     # Проверяем существование виртуального окружения
     if not venv_path.exists():
@@ -171,13 +178,19 @@ def activate_and_run():
         logger.error("Ошибка: Файл main.py не найден!")
         sys.exit(1)
 
+    main_args = f'-s {" ".join(args.serials)}'
+    if args.mirror:
+        main_args += " --mirror"
+    if extra_args:
+        main_args += " " + " ".join(extra_args)
+
     # Команда активации в зависимости от ОС
     if os.name == 'nt':  # Windows
         activate_script = venv_path / "Scripts" / "activate.bat"
-        command = f'call "{activate_script}" && python {main_script} -s {" ".join(args.serials)}'
+        command = f'call "{activate_script}" && python {main_script} {main_args}'
     else:  # Linux/Mac
         activate_script = venv_path / "bin" / "activate"
-        command = f'source "{activate_script}" && python3 {main_script} -s {" ".join(args.serials)}'
+        command = f'source "{activate_script}" && python3 {main_script} {main_args}'
 
     # Запускаем
     try: